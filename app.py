@@ -1,6 +1,19 @@
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
+import threading
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from income_shield import perf
+from income_shield.charts import add_lines, line_traces
+from income_shield.data import new_state, load_store
+from income_shield.engine import (
+    calculate_journey, calculate_comparison, window_entry_price, window_summary, window_dividend_dates,
+    LEADERBOARD_WINDOWS, leaderboard_start, leaderboard_table, entry_return_grid,
+    REBALANCE_MONTHS, simulate_portfolio,
+)
+from income_shield.projection import project_income
+from income_shield.screener import SCREENER_WINDOWS
+from income_shield.schema import from_day, to_day
 
 # --- 1. PAGE CONFIGURATION ---
 st.set_page_config(
@@ -165,82 +178,138 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+# --- PROFILING (opt-in: ?debug=1 for this session, INCOME_SHIELD_PERF=1 for all) ---
+show_debug = st.query_params.get("debug") == "1"
+run_ctx = get_script_run_ctx()
+rerun = perf.PerfRecorder(
+    enabled=show_debug or perf.PERF_ENABLED,
+    session=run_ctx.session_id if run_ctx else None,
+).activate()
+
 # --- 3. DATA LOADING ---
-@st.cache_data(ttl=300)
+@st.cache_resource
+def process_state():
+    return new_state()
+
+
+# Every session gets a reference to the same frozen store, never its own copy.
+# load_store never waits on the network once anything is loaded: stale data is
+# served while a background thread revalidates it, and a refresh publishes the
+# new store with a single assignment that later reruns pick up.
 def load_data():
-    try:
-        u_url = "https://docs.google.com/spreadsheets/d/e/2PACX-1vSBejJoRecA-lq52GgBYkpqFv7LanUurbzcl4Hqd0QRjufGX-2LSSZjAjPg7DeQ9-Q8o_sc3A9y3739/pub?gid=1848266904&single=true&output=csv"
-        h_url = "https://docs.google.com/spreadsheets/d/e/2PACX-1vSBejJoRecA-lq52GgBYkpqFv7LanUurbzcl4Hqd0QRjufGX-2LSSZjAjPg7DeQ9-Q8o_sc3A9y3739/pub?gid=970184313&single=true&output=csv"
-        
-        df_u = pd.read_csv(u_url)
-        df_h = pd.read_csv(h_url)
-        
-        df_u['Date'] = pd.to_datetime(df_u['Date'])
-        df_h['Date of Pay'] = pd.to_datetime(df_h['Date of Pay'])
-        return df_u, df_h
-    except Exception as e:
-        st.error(f"Data loading error: {str(e)}")
-        return None, None
-
-df_unified, df_history = load_data()
-if df_unified is None:
+    store, problem = load_store(process_state())
+    if problem:
+        (st.error if store is None else st.warning)(problem)
+    return store
+
+with perf.span("load_data"):
+    store = load_data()
+if store is None:
     st.stop()
 
-# --- HELPER: COMPOUNDING ENGINE ---
-def calculate_journey(ticker, start_date, end_date, initial_shares, drip_enabled, unified_df, history_df):
-    t_price = unified_df[unified_df['Ticker'] == ticker].sort_values('Date')
-    journey = t_price[(t_price['Date'] >= start_date) & (t_price['Date'] <= end_date)].copy()
-    
-    if journey.empty:
-        return journey
-        
-    t_divs = history_df[history_df['Ticker'] == ticker].sort_values('Date of Pay')
-    relevant_divs = t_divs[(t_divs['Date of Pay'] >= start_date) & (t_divs['Date of Pay'] <= end_date)].copy()
-    
-    journey = journey.set_index('Date')
-    journey['Shares'] = initial_shares
-    journey['Cash_Pocketed'] = 0.0
-    
-    current_shares = initial_shares
-    cum_cash = 0.0
-    
-    if not relevant_divs.empty:
-        for _, row in relevant_divs.iterrows():
-            d_date = row['Date of Pay']
-            d_amt = row['Amount']
-            
-            if d_date in journey.index:
-                payout = current_shares * d_amt
-                
-                if drip_enabled:
-                    reinvest_price = journey.loc[d_date, 'Closing Price']
-                    new_shares = payout / reinvest_price
-                    current_shares += new_shares
-                    journey.loc[d_date:, 'Shares'] = current_shares
-                else:
-                    cum_cash += payout
-                    journey.loc[d_date:, 'Cash_Pocketed'] = cum_cash
-
-    journey = journey.reset_index()
-    journey['Market_Value'] = journey['Closing Price'] * journey['Shares']
-    
-    # Base Value = What your initial shares are worth today (No DRIP, No Cash)
-    journey['Base_Asset_Value'] = journey['Closing Price'] * initial_shares
 
-    if drip_enabled:
-        journey['True_Value'] = journey['Market_Value']
-    else:
-        journey['True_Value'] = journey['Market_Value'] + journey['Cash_Pocketed']
-    
-    return journey
+# --- HELPER: UNIVERSE LEADERBOARD ---
+@st.cache_data(max_entries=128, show_spinner=False)
+def universe_leaderboard(start_date, end_date, drip_enabled, version, _store):
+    # `version` keys the cache to the data, `_store` is not hashed
+    perf.count("cache.leaderboard.miss")
+    return leaderboard_table(_store, start_date, end_date, drip_enabled)
+
+
+@st.cache_resource(show_spinner=False)
+def warm_leaderboards(version, today, _store):
+    # Runs once per (data version, day): fill the leaderboard cache for the preset
+    # windows in the background so the first viewer of each gets a cache hit
+    def work():
+        for window in LEADERBOARD_WINDOWS:
+            for drip in (False, True):
+                universe_leaderboard(leaderboard_start(window, today, _store), today, drip, version, _store)
+
+    thread = threading.Thread(target=work, name=f"warm-leaderboards-{version}", daemon=True)
+    add_script_run_ctx(thread)
+    thread.start()
+    return thread
+
+
+warm_leaderboards(store['version'], pd.to_datetime("today").normalize(), store)
+
+
+# --- HELPER: INCOME PROJECTION ---
+@st.cache_data(max_entries=64, show_spinner=False)
+def income_projection(ticker, years, drip_enabled, history_start, version, _store):
+    # Bands per $1 invested; the page scales them by the amount
+    perf.count("cache.projection.miss")
+    return project_income(_store, ticker, years, drip_enabled, history_start=history_start)
+
+
+def band_figure(bands, color, fill, baseline=None):
+    # P5-P95 and P25-P75 as nested fills around the median path
+    fig = go.Figure()
+    for lo, hi, alpha in ((5, 95, 0.08), (25, 75, 0.18)):
+        fig.add_trace(go.Scatter(x=bands.index, y=bands[lo], mode='lines', line=dict(width=0), showlegend=False, hoverinfo='skip'))
+        fig.add_trace(go.Scatter(
+            x=bands.index, y=bands[hi], mode='lines', line=dict(width=0), name=f"P{lo}-P{hi}",
+            fill='tonexty', fillcolor=fill.format(alpha=alpha), hoverinfo='skip'
+        ))
+    fig.add_trace(go.Scatter(x=bands.index, y=bands[50], mode='lines', name='Median', line=dict(color=color, width=3)))
+    if baseline is not None:
+        fig.add_hline(y=baseline, line_dash="dash", line_color="white", opacity=0.3)
+    fig.update_layout(
+        template="plotly_dark", paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
+        height=300, margin=dict(l=0, r=0, t=20, b=0), showlegend=False, hovermode="x unified",
+        xaxis=dict(fixedrange=True), yaxis=dict(fixedrange=True, tickprefix="$")
+    )
+    return fig
+
+
+# --- HELPER: SINGLE ASSET CHART & TABLE ---
+# Sidebar widgets always rerun the whole script, so each part of the page reads
+# from a cache keyed on only what it depends on: the catalog per data version,
+# these lines per (ticker, window, DRIP), the metrics from the prefix arrays.
+@st.cache_data(max_entries=256, show_spinner=False)
+def journey_traces(ticker, start_day, end_day, drip_enabled, version, _store):
+    # Thinned lines for one share; LTTB picks the same points at any scale.
+    # If DRIP OFF the bottom line is Market Value (Price Action); if DRIP ON it is
+    # Base Asset Value (what it would be without DRIP). The top line is True Value.
+    perf.count("cache.journey_chart.miss")
+    start_date, end_date = from_day(start_day), from_day(end_day)
+    journey = calculate_journey(ticker, start_date, end_date, 1.0, drip_enabled, _store)
+    bottom_y = journey['Market_Value'] if not drip_enabled else journey['Base_Asset_Value']
+    price_color = '#8AC7DE' if journey.iloc[-1]['Closing Price'] >= journey.iloc[0]['Closing Price'] else '#FF4B4B'
+    bottom_line = dict(
+        mode='lines', name='Asset Price',
+        line=dict(color=price_color, width=2) # Solid line for base
+    )
+    top_line = dict(
+        mode='lines', name='True Value',
+        line=dict(color='#00C805', width=3),
+        fill='tonexty', # This fills the gap between this line and the previous one (Asset Price)
+        fillcolor='rgba(0, 200, 5, 0.1)'
+    )
+    # Both lines are thinned together so the fill stays aligned; payout days stay exact
+    dividend_dates = window_dividend_dates(_store, ticker, start_date, end_date)
+    return line_traces([(journey['Date'], dividend_dates, [(bottom_y, bottom_line), (journey['True_Value'], top_line)])])
+
+
+@st.fragment
+def journey_table(ticker, buy_date, end_date, initial_shares, drip_enabled):
+    # Opening or closing the expander reruns only this fragment, and the table is
+    # only built and sent while it is open
+    data_view = st.expander("View Data", key="single_asset_data", on_change="rerun")
+    if data_view.open:
+        with data_view, perf.span("render.table"):
+            journey = calculate_journey(ticker, buy_date, end_date, initial_shares, drip_enabled, store)
+            st.dataframe(journey.sort_values('Date', ascending=False), use_container_width=True)
 
 
 # ==========================================
 #         SIDEBAR & MODE SELECTION
 # ==========================================
 with st.sidebar:
-    app_mode = st.radio("Select Mode", ["🛡️ Single Asset", "⚔️ Head-to-Head"], label_visibility="collapsed")
-    all_tickers = sorted(df_unified['Ticker'].unique())
+    app_mode = st.radio("Select Mode", ["🛡️ Single Asset", "⚔️ Head-to-Head", "🏆 Leaderboard", "🔮 Projection", "🎯 Entry Timing", "💼 Portfolio", "🔎 Screener"], label_visibility="collapsed")
+    rerun.context['mode'] = app_mode
+    catalog = store['catalog']
+    all_tickers = catalog.index.tolist()
 
     # ------------------------------------
     # MODE A: SINGLE ASSET
@@ -248,12 +317,7 @@ with st.sidebar:
     if app_mode == "🛡️ Single Asset":
         selected_ticker = st.selectbox("Select Asset", all_tickers)
 
-        price_df = df_unified[df_unified['Ticker'] == selected_ticker].sort_values('Date')
-        if price_df.empty:
-            st.error("No data.")
-            st.stop()
-        
-        inception_date = price_df['Date'].min()
+        inception_date = catalog.at[selected_ticker, 'Inception']
         use_inception = st.checkbox("🚀 Start from Inception", value=False)
 
         if use_inception:
@@ -279,9 +343,8 @@ with st.sidebar:
         use_drip = st.checkbox("🔄 Enable DRIP", value=False, help="Reinvests all dividends back into shares.")
 
         # Initial Share Calculation
-        temp_journey = price_df[(price_df['Date'] >= buy_date) & (price_df['Date'] <= end_date)]
-        if not temp_journey.empty:
-            entry_price = temp_journey.iloc[0]['Closing Price']
+        entry_price = window_entry_price(store, selected_ticker, buy_date, end_date)
+        if entry_price is not None:
             if mode == "Share Count":
                 initial_shares = st.number_input("Shares Owned", min_value=1, value=10)
                 sim_amt = initial_shares * entry_price # approx
@@ -297,7 +360,7 @@ with st.sidebar:
     # ------------------------------------
     # MODE B: HEAD-TO-HEAD
     # ------------------------------------
-    else:
+    elif app_mode == "⚔️ Head-to-Head":
         selected_tickers = st.multiselect("Select Assets to Compare", all_tickers, default=all_tickers[:2] if len(all_tickers) > 1 else all_tickers)
         
         st.markdown("##### Common Date Range")
@@ -315,6 +378,86 @@ with st.sidebar:
         
         st.info(f"Leaderboard assumes ${sim_amt:,.0f} invested in each.")
 
+    # ------------------------------------
+    # MODE C: UNIVERSE LEADERBOARD
+    # ------------------------------------
+    elif app_mode == "🏆 Leaderboard":
+        board_window = st.radio("Window", LEADERBOARD_WINDOWS + ["Custom"], index=3, horizontal=True)
+        today = pd.to_datetime("today").normalize()
+        if board_window == "Custom":
+            buy_date = pd.to_datetime(st.date_input("Start Date", today - pd.DateOffset(months=12)))
+            end_date = pd.to_datetime(st.date_input("End Date", today))
+        else:
+            buy_date = leaderboard_start(board_window, today, store)
+            end_date = today
+
+        sim_amt = st.number_input("Hypothetical Investment ($)", value=10000, step=1000)
+        use_drip = st.checkbox("🔄 Enable DRIP", value=False, help="Reinvests all dividends back into shares.")
+        rank_options = ["Total Return", "📈 New Shares Added"] if use_drip else ["Total Return", "💰 Cash Generated", "Yield %"]
+        rank_by = st.selectbox("Rank By", rank_options)
+
+        st.info(f"Every asset in the sheet, ${sim_amt:,.0f} invested in each.")
+
+    # ------------------------------------
+    # MODE D: INCOME PROJECTION
+    # ------------------------------------
+    elif app_mode == "🔮 Projection":
+        selected_ticker = st.selectbox("Select Asset", all_tickers)
+        horizon_years = st.slider("Years Ahead", min_value=1, max_value=5, value=5)
+        history_window = st.radio("Resample History From", ["1Y", "3Y", "Inception"], index=2, horizontal=True)
+        today = pd.to_datetime("today").normalize()
+        history_start = None if history_window == "Inception" else today - pd.DateOffset(years=int(history_window[0]))
+
+        sim_amt = st.number_input("Amount Invested ($)", min_value=100, value=10000, step=1000)
+        use_drip = st.checkbox("🔄 Enable DRIP", value=False, help="Reinvests all dividends back into shares.")
+
+        st.info("10,000 futures resampled from this asset's own prices and payouts, a month at a time.")
+
+    # ------------------------------------
+    # MODE E: ENTRY TIMING
+    # ------------------------------------
+    elif app_mode == "🎯 Entry Timing":
+        selected_ticker = st.selectbox("Select Asset", all_tickers)
+        use_drip = st.checkbox("🔄 Enable DRIP", value=False, help="Reinvests all dividends back into shares.")
+        st.info("Every purchase date in the sheet, held for each period.")
+
+    # ------------------------------------
+    # MODE F: PORTFOLIO
+    # ------------------------------------
+    elif app_mode == "💼 Portfolio":
+        selected_tickers = st.multiselect("Holdings", all_tickers, default=all_tickers[:3])
+        holdings = st.data_editor(
+            pd.DataFrame({"Ticker": selected_tickers, "Weight %": 100 / max(len(selected_tickers), 1), "DRIP": False}),
+            column_config={
+                "Ticker": st.column_config.TextColumn(disabled=True),
+                "Weight %": st.column_config.NumberColumn(min_value=0.0, max_value=100.0, step=0.5, format="%.1f"),
+                "DRIP": st.column_config.CheckboxColumn(help="Reinvest this holding's dividends"),
+            },
+            hide_index=True,
+            use_container_width=True
+        )
+
+        st.markdown("##### Date Range")
+        default_start = pd.to_datetime("today") - pd.DateOffset(months=12)
+        buy_date = pd.to_datetime(st.date_input("Start Date", default_start))
+        end_date = pd.to_datetime(st.date_input("End Date", pd.to_datetime("today")))
+
+        sim_amt = st.number_input("Portfolio Investment ($)", value=10000, step=1000)
+        rebalance = st.selectbox("Rebalance", list(REBALANCE_MONTHS), index=2)
+        st.info("Weights are scaled to 100%. Rebalancing resets holdings to target at the first close of each period.")
+
+    # ------------------------------------
+    # MODE G: SCREENER
+    # ------------------------------------
+    elif app_mode == "🔎 Screener":
+        screen_window = st.radio("Return Window", list(SCREENER_WINDOWS), index=2, horizontal=True)
+        screen_frequencies = st.multiselect("Frequency", sorted(store['screener']['Frequency'].unique()))
+        min_yield = st.number_input("Min TTM Yield %", min_value=0.0, value=0.0, step=5.0)
+        max_erosion = st.slider("Max NAV Erosion %", min_value=0, max_value=100, value=100)
+        hide_cuts = st.checkbox("✂️ Hide Recent Cuts", value=False, help="Last payout 25%+ below the median of the six before it.")
+        screen_sort = st.selectbox("Sort By", ["TTM Yield %", "DRIP Return", "Cash Return", "Income Trend %", "NAV Erosion %"])
+        st.info("Metrics are as of each asset's last close.")
+
 
 # ==========================================
 #           MAIN PAGE LOGIC
@@ -323,13 +466,14 @@ with st.sidebar:
 # >>>>>>>>>>>>>>> MODE A: SINGLE ASSET DASHBOARD <<<<<<<<<<<<<<<
 if app_mode == "🛡️ Single Asset":
     
-    journey = calculate_journey(selected_ticker, buy_date, end_date, initial_shares, use_drip, df_unified, df_history)
+    with perf.span("engine.summary"):
+        summary = window_summary(store, selected_ticker, buy_date, end_date, initial_shares, use_drip)
     
     initial_cap = entry_price * initial_shares
-    current_market_val = journey.iloc[-1]['Market_Value']
-    cash_total = journey.iloc[-1]['Cash_Pocketed']
-    current_total_val = journey.iloc[-1]['True_Value']
-    final_shares = journey.iloc[-1]['Shares']
+    current_market_val = summary['Market_Value']
+    cash_total = summary['Cash_Pocketed']
+    current_total_val = summary['True_Value']
+    final_shares = summary['Shares']
 
     market_pl = current_market_val - initial_cap
     market_pl_pct = (market_pl / initial_cap) * 100 if initial_cap != 0 else 0
@@ -340,12 +484,8 @@ if app_mode == "🛡️ Single Asset":
     annual_yield = (cash_total/initial_cap)*(365.25/days_held)*100 if days_held > 0 else 0
 
     # 2. HEADER
-    try:
-        meta_row = df_unified[df_unified['Ticker'] == selected_ticker].iloc[0]
-        asset_underlying = meta_row.get('Underlying', '-')
-        asset_company = meta_row.get('Company', '-')
-    except:
-        asset_underlying, asset_company = "-", "-"
+    asset_underlying = catalog.at[selected_ticker, 'Underlying']
+    asset_company = catalog.at[selected_ticker, 'Company']
 
     col_head, col_meta = st.columns([1.8, 1.2])
     with col_head:
@@ -394,50 +534,33 @@ if app_mode == "🛡️ Single Asset":
     m5.metric("True Total Value", f"${current_total_val:,.2f}", f"{total_return_pct:.2f}%")
 
     # 4. SINGLE CHART (Restored Logic)
-    fig = go.Figure()
-    
-    # Trace A: The "Bottom" Line (Reference)
-    # If DRIP OFF: This is Market Value (Price Action)
-    # If DRIP ON:  This is Base Asset Value (What it would be without DRIP)
-    bottom_y = journey['Market_Value'] if not use_drip else journey['Base_Asset_Value']
-    
-    # Trace B: The "Top" Line (Total Return)
-    top_y = journey['True_Value']
-    
-    # 1. Plot Bottom Line (Reference)
-    price_color = '#8AC7DE' if journey.iloc[-1]['Closing Price'] >= journey.iloc[0]['Closing Price'] else '#FF4B4B'
-    fig.add_trace(go.Scatter(
-        x=journey['Date'], y=bottom_y, 
-        mode='lines', name='Asset Price', 
-        line=dict(color=price_color, width=2) # Solid line for base
-    ))
-
-    # 2. Plot Top Line (Total Value) with FILL to the Bottom Line
-    fig.add_trace(go.Scatter(
-        x=journey['Date'], y=top_y, 
-        mode='lines', name='True Value', 
-        line=dict(color='#00C805', width=3), 
-        fill='tonexty', # This fills the gap between this line and the previous one (Asset Price)
-        fillcolor='rgba(0, 200, 5, 0.1)'
-    ))
+    # Lines come from the per-share cache below, so a new amount is only a multiply
+    with perf.span("chart.build"):
+        fig = go.Figure()
+        fig.add_traces([
+            dict(trace, y=trace['y'] * initial_shares)
+            for trace in journey_traces(selected_ticker, to_day(buy_date, ceil=True), to_day(end_date), use_drip,
+                                        store['version'], store)
+        ])
     
-    fig.add_hline(y=initial_cap, line_dash="dash", line_color="white", opacity=0.3)
+        fig.add_hline(y=initial_cap, line_dash="dash", line_color="white", opacity=0.3)
 
-    profit_text = f"PROFIT: +${total_pl:,.2f}" if total_pl >= 0 else f"LOSS: -${abs(total_pl):,.2f}"
-    profit_bg = "#00C805" if total_pl >= 0 else "#FF4B4B"
+        profit_text = f"PROFIT: +${total_pl:,.2f}" if total_pl >= 0 else f"LOSS: -${abs(total_pl):,.2f}"
+        profit_bg = "#00C805" if total_pl >= 0 else "#FF4B4B"
 
-    fig.add_annotation(
-        x=0.02, y=0.95, xref="paper", yref="paper", text=profit_text, showarrow=False,
-        font=dict(family="Arial Black, sans-serif", size=16, color="white"),
-        bgcolor=profit_bg, bordercolor=profit_bg, borderpad=8, opacity=0.9, align="left"
-    )
+        fig.add_annotation(
+            x=0.02, y=0.95, xref="paper", yref="paper", text=profit_text, showarrow=False,
+            font=dict(family="Arial Black, sans-serif", size=16, color="white"),
+            bgcolor=profit_bg, bordercolor=profit_bg, borderpad=8, opacity=0.9, align="left"
+        )
 
-    fig.update_layout(
-        template="plotly_dark", paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
-        height=340, margin=dict(l=0, r=0, t=20, b=0), showlegend=False, hovermode="x unified",
-        xaxis=dict(fixedrange=True), yaxis=dict(fixedrange=True)
-    )
-    st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})
+        fig.update_layout(
+            template="plotly_dark", paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
+            height=340, margin=dict(l=0, r=0, t=20, b=0), showlegend=False, hovermode="x unified",
+            xaxis=dict(fixedrange=True), yaxis=dict(fixedrange=True)
+        )
+    with perf.span("render.chart"):
+        st.plotly_chart(fig, use_container_width=True, config={'displayModeBar': False})
 
     # 5. LEGEND DECODER
     st.markdown("""
@@ -448,12 +571,11 @@ if app_mode == "🛡️ Single Asset":
         </div>
     """, unsafe_allow_html=True)
     
-    with st.expander("View Data"):
-        st.dataframe(journey.sort_values('Date', ascending=False), use_container_width=True)
+    journey_table(selected_ticker, buy_date, end_date, initial_shares, use_drip)
 
 
 # >>>>>>>>>>>>>>> MODE B: HEAD-TO-HEAD COMPARISON <<<<<<<<<<<<<<<
-else:
+elif app_mode == "⚔️ Head-to-Head":
     # --------------------------------------------------------
     # RESTORED TITLE STYLE: Standard Markdown (White + Blue)
     # --------------------------------------------------------
@@ -470,39 +592,36 @@ else:
         st.stop()
         
     comp_data = []
+    comp_lines = []
     fig_comp = go.Figure()
     
     colors = ['#00C805', '#F59E0B', '#8AC7DE', '#FF4B4B', '#A855F7', '#EC4899', '#EAB308']
     
+    with perf.span("engine.comparison"):
+        comp_curves = calculate_comparison(selected_tickers, buy_date, end_date, sim_amt, use_drip, store)
+    
     for idx, t in enumerate(selected_tickers):
-        t_price_check = df_unified[df_unified['Ticker'] == t].sort_values('Date')
-        t_price_check = t_price_check[(t_price_check['Date'] >= buy_date) & (t_price_check['Date'] <= end_date)]
+        start_p = window_entry_price(store, t, buy_date, end_date)
         
-        if t_price_check.empty:
+        if start_p is None:
             continue
             
-        start_p = t_price_check.iloc[0]['Closing Price']
         initial_s = sim_amt / start_p
         
-        t_journey = calculate_journey(t, buy_date, end_date, initial_s, use_drip, df_unified, df_history)
-        
-        if t_journey.empty:
-            continue
+        t_curve = comp_curves[t].dropna()
 
         initial_cap = sim_amt
-        t_journey['Total_Return_Pct'] = ((t_journey['True_Value'] - initial_cap) / initial_cap) * 100
         
         line_color = colors[idx % len(colors)]
-        fig_comp.add_trace(go.Scatter(
-            x=t_journey['Date'], 
-            y=t_journey['Total_Return_Pct'], 
+        comp_lines.append((t_curve.index, window_dividend_dates(store, t, buy_date, end_date), [(t_curve.values, dict(
             mode='lines', 
             name=t,
             line=dict(color=line_color, width=3)
-        ))
+        ))]))
         
-        final_row = t_journey.iloc[-1]
-        final_ret = final_row['Total_Return_Pct']
+        with perf.span("engine.summary"):
+            final_row = window_summary(store, t, buy_date, end_date, initial_s, use_drip)
+        final_ret = ((final_row['True_Value'] - initial_cap) / initial_cap) * 100
         
         end_value = final_row['Market_Value']
         cash_generated = final_row['Cash_Pocketed']
@@ -531,21 +650,24 @@ else:
 
         comp_data.append(data_row)
         
-    fig_comp.add_hline(y=0, line_dash="solid", line_color="white", opacity=0.5, annotation_text="Break Even")
-    
-    fig_comp.update_layout(
-        template="plotly_dark",
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        height=400,
-        margin=dict(l=0, r=0, t=30, b=0),
-        hovermode="x unified",
-        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1, font=dict(color="white")),
-        yaxis_title="Total Return (%)",
-        xaxis=dict(fixedrange=True), yaxis=dict(fixedrange=True)
-    )
+    with perf.span("chart.build"):
+        add_lines(fig_comp, comp_lines)
+        fig_comp.add_hline(y=0, line_dash="solid", line_color="white", opacity=0.5, annotation_text="Break Even")
+        
+        fig_comp.update_layout(
+            template="plotly_dark",
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(0,0,0,0)',
+            height=400,
+            margin=dict(l=0, r=0, t=30, b=0),
+            hovermode="x unified",
+            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1, font=dict(color="white")),
+            yaxis_title="Total Return (%)",
+            xaxis=dict(fixedrange=True), yaxis=dict(fixedrange=True)
+        )
     
-    st.plotly_chart(fig_comp, use_container_width=True, config={'displayModeBar': False})
+    with perf.span("render.chart"):
+        st.plotly_chart(fig_comp, use_container_width=True, config={'displayModeBar': False})
     
     if comp_data:
         st.markdown(f"### 🏆 Leaderboard (${sim_amt:,.0f} Investment)")
@@ -564,9 +686,301 @@ else:
              df_display['📉 Share Value (Remaining)'] = df_display['📉 Share Value (Remaining)'].apply(lambda x: f"${x:,.2f}")
              cols = ["Ticker", "Total Return", "Yield %", "💰 Cash Generated", "📉 Share Value (Remaining)", "💚 Total Value"]
 
+        with perf.span("render.table"):
+            st.dataframe(
+                df_display, 
+                column_order=cols,
+                hide_index=True,
+                use_container_width=True
+            )
+
+
+# >>>>>>>>>>>>>>> MODE C: UNIVERSE LEADERBOARD <<<<<<<<<<<<<<<
+elif app_mode == "🏆 Leaderboard":
+    st.markdown("""
+        <div style="margin-top: -10px; margin-bottom: 20px;">
+            <h1 style="font-size: 2.5rem; margin-bottom: 0px; color: #E6EDF3; line-height: 1.2;">
+                🏆 Universe <span style="color: #8AC7DE;">Leaderboard</span>
+            </h1>
+        </div>
+    """, unsafe_allow_html=True)
+
+    with perf.span("engine.leaderboard"):
+        board = universe_leaderboard(buy_date, end_date, use_drip, store['version'], store)
+    perf.count("cache.leaderboard.call")
+    if board.empty:
+        st.warning("No assets have price data in this window.")
+        st.stop()
+
+    # Cached rows are per $1 invested; returns and yields are already scale-free
+    board = board.sort_values(rank_by, ascending=False).reset_index(drop=True)
+    for col in ["💰 Cash Generated", "📈 New Shares Added", "📉 Share Value (Remaining)", "💚 Total Value"]:
+        board[col] = board[col] * sim_amt
+    board.insert(0, "#", board.index + 1)
+
+    st.markdown(f"### {len(board)} Assets Ranked by {rank_by} (${sim_amt:,.0f} Investment, {buy_date.date()} ➝ {end_date.date()})")
+
+    board['Total Return'] = board['Total Return'].apply(lambda x: f"{x:+.2f}%")
+    board['💚 Total Value'] = board['💚 Total Value'].apply(lambda x: f"${x:,.2f}")
+
+    if use_drip:
+        board['📈 New Shares Added'] = board['📈 New Shares Added'].apply(lambda x: f"{x:.2f}")
+        cols = ["#", "Ticker", "Since", "Total Return", "📈 New Shares Added", "💚 Total Value"]
+    else:
+        board['Yield %'] = board['Yield %'].apply(lambda x: f"{x:.2f}%")
+        board['💰 Cash Generated'] = board['💰 Cash Generated'].apply(lambda x: f"${x:,.2f}")
+        board['📉 Share Value (Remaining)'] = board['📉 Share Value (Remaining)'].apply(lambda x: f"${x:,.2f}")
+        cols = ["#", "Ticker", "Since", "Total Return", "Yield %", "💰 Cash Generated", "📉 Share Value (Remaining)", "💚 Total Value"]
+
+    with perf.span("render.table"):
         st.dataframe(
-            df_display, 
+            board,
             column_order=cols,
             hide_index=True,
+            use_container_width=True,
+            height=600
+        )
+
+
+# >>>>>>>>>>>>>>> MODE D: INCOME PROJECTION <<<<<<<<<<<<<<<
+elif app_mode == "🔮 Projection":
+    st.markdown(f"""
+        <div style="margin-top: -10px; margin-bottom: 20px;">
+            <h1 style="font-size: 2.5rem; margin-bottom: 0px; color: #E6EDF3; line-height: 1.2;">
+                🔮 {selected_ticker} <span style="color: #8AC7DE;">Income Projection</span>
+            </h1>
+        </div>
+    """, unsafe_allow_html=True)
+
+    with perf.span("engine.projection"):
+        bands = income_projection(selected_ticker, horizon_years, use_drip, history_start, store['version'], store)
+    perf.count("cache.projection.call")
+    if bands is None:
+        st.warning("Not enough price history in this window to resample.")
+        st.stop()
+
+    value_bands = bands['True_Value'] * sim_amt
+    income_bands = bands['Income'] * sim_amt
+    final_value, final_income = value_bands.iloc[-1], income_bands.iloc[-1]
+    income_label = "Dividends Reinvested" if use_drip else "Dividends Collected"
+
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Initial Capital", f"${sim_amt:,.2f}")
+    m2.metric("Median True Value", f"${final_value[50]:,.2f}", f"{(final_value[50] / sim_amt - 1) * 100:+.2f}%")
+    m3.metric("Likely Range (P5-P95)", f"${final_value[5]:,.0f} - ${final_value[95]:,.0f}")
+    m4.metric(f"Median {income_label}", f"${final_income[50]:,.2f}")
+
+    with perf.span("chart.build"):
+        fig_value = band_figure(value_bands, '#00C805', 'rgba(0, 200, 5, {alpha})', baseline=sim_amt)
+        fig_income = band_figure(income_bands, '#F59E0B', 'rgba(245, 158, 11, {alpha})')
+
+    with perf.span("render.chart"):
+        st.markdown("### 💚 True Value")
+        st.plotly_chart(fig_value, use_container_width=True, config={'displayModeBar': False})
+        st.markdown(f"### 💰 Cumulative {income_label}")
+        st.plotly_chart(fig_income, use_container_width=True, config={'displayModeBar': False})
+
+    with st.expander("View Percentiles"):
+        with perf.span("render.table"):
+            table = pd.concat({'True Value': value_bands, income_label: income_bands}, axis=1)
+            table.columns = [f"{name} P{band}" for name, band in table.columns]
+            st.dataframe(table.iloc[::-1].style.format("${:,.2f}"), use_container_width=True)
+
+
+# >>>>>>>>>>>>>>> MODE E: ENTRY TIMING <<<<<<<<<<<<<<<
+elif app_mode == "🎯 Entry Timing":
+    st.markdown(f"""
+        <div style="margin-top: -10px; margin-bottom: 20px;">
+            <h1 style="font-size: 2.5rem; margin-bottom: 0px; color: #E6EDF3; line-height: 1.2;">
+                🎯 {selected_ticker} <span style="color: #8AC7DE;">Entry Timing</span>
+            </h1>
+        </div>
+    """, unsafe_allow_html=True)
+
+    # Both settings are milliseconds of array math; the table compares them.
+    # Periods longer than the whole history have no entries and are dropped.
+    with perf.span("engine.entry_grid"):
+        grids = {drip: entry_return_grid(store, selected_ticker, drip).dropna(how='all').dropna(axis=1, how='all') for drip in (False, True)}
+    grid = grids[use_drip]
+    if grid.empty:
+        st.warning("Not enough history to complete any holding period.")
+        st.stop()
+
+    with perf.span("chart.build"):
+        fig_grid = go.Figure(go.Heatmap(
+            x=grid.index, y=list(grid.columns), z=grid.T.values,
+            colorscale=[[0, '#FF4B4B'], [0.5, '#161b22'], [1, '#00C805']], zmid=0,
+            colorbar=dict(ticksuffix="%", thickness=12),
+            hovertemplate="Bought %{x|%Y-%m-%d}<br>Held %{y}<br>Total Return %{z:+.2f}%<extra></extra>"
+        ))
+        fig_grid.update_layout(
+            template="plotly_dark", paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
+            height=360, margin=dict(l=0, r=0, t=20, b=0),
+            xaxis=dict(fixedrange=True, title="Purchase Date"),
+            yaxis=dict(fixedrange=True, autorange="reversed", title="Held For")
+        )
+    with perf.span("render.chart"):
+        st.plotly_chart(fig_grid, use_container_width=True, config={'displayModeBar': False})
+
+    timing = pd.DataFrame({
+        "Held For": grid.columns,
+        "Entries": grid.count().values,
+        "Worst": grid.min().values,
+        "Median": grid.median().values,
+        "Best": grid.max().values,
+        "% Positive": ((grid > 0).sum() / grid.count() * 100).values,
+        "DRIP Edge (Median)": (grids[True].median() - grids[False].median()).reindex(grid.columns).values,
+    })
+    st.markdown(f"### Total Return by Holding Period ({'DRIP' if use_drip else 'Cash'})")
+    with perf.span("render.table"):
+        st.dataframe(
+            timing.style.format({
+                "Worst": "{:+.2f}%", "Median": "{:+.2f}%", "Best": "{:+.2f}%",
+                "% Positive": "{:.0f}%", "DRIP Edge (Median)": "{:+.2f}%",
+            }, na_rep="-"),
+            hide_index=True,
+            use_container_width=True
+        )
+
+
+# >>>>>>>>>>>>>>> MODE F: PORTFOLIO <<<<<<<<<<<<<<<
+elif app_mode == "💼 Portfolio":
+    st.markdown("""
+        <div style="margin-top: -10px; margin-bottom: 20px;">
+            <h1 style="font-size: 2.5rem; margin-bottom: 0px; color: #E6EDF3; line-height: 1.2;">
+                💼 Portfolio <span style="color: #8AC7DE;">Simulator</span>
+            </h1>
+        </div>
+    """, unsafe_allow_html=True)
+
+    if holdings.empty or holdings["Weight %"].fillna(0).sum() <= 0:
+        st.warning("Please add at least one holding with a weight in the sidebar.")
+        st.stop()
+
+    with perf.span("engine.portfolio"):
+        series, attribution = simulate_portfolio(
+            holdings["Ticker"].tolist(), holdings["Weight %"].fillna(0).tolist(), holdings["DRIP"].fillna(False).tolist(),
+            buy_date, end_date, sim_amt, store, rebalance
+        )
+    if series.empty:
+        st.warning("None of these holdings have price data in this window.")
+        st.stop()
+
+    dropped = sorted(set(holdings["Ticker"]) - set(attribution["Ticker"]))
+    if dropped:
+        st.warning(f"No price data in this window for: {', '.join(dropped)}")
+
+    final = series.iloc[-1]
+    total_pl = final['True_Value'] - sim_amt
+    p1, p2, p3, p4, p5 = st.columns(5)
+    p1.metric("Initial Capital", f"${sim_amt:,.2f}")
+    p2.metric("Market Value", f"${final['Market_Value']:,.2f}", f"{(final['Market_Value'] / sim_amt - 1) * 100:+.2f}%")
+    p3.metric("Cash Pocketed", f"${final['Cash_Pocketed']:,.2f}")
+    p4.metric("Total Income", f"${final['Income']:,.2f}")
+    p5.metric("True Total Value", f"${final['True_Value']:,.2f}", f"{total_pl / sim_amt * 100:.2f}%")
+    st.markdown(
+        f"<div style='color: #8AC7DE; margin-bottom: 10px;'>{series.index[0].date()} ➝ {series.index[-1].date()} "
+        f"(first close shared by every holding) &nbsp;|&nbsp; Rebalance: {rebalance}</div>",
+        unsafe_allow_html=True
+    )
+
+    with perf.span("chart.build"):
+        fig_port = go.Figure()
+        add_lines(fig_port, [(series.index, series.index[:0], [
+            (series['Market_Value'], dict(mode='lines', name='Market Value', line=dict(color='#8AC7DE', width=2))),
+            (series['True_Value'], dict(
+                mode='lines', name='True Value', line=dict(color='#00C805', width=3),
+                fill='tonexty', fillcolor='rgba(0, 200, 5, 0.1)'
+            )),
+        ])])
+        fig_port.add_hline(y=sim_amt, line_dash="dash", line_color="white", opacity=0.3)
+        fig_port.update_layout(
+            template="plotly_dark", paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
+            height=340, margin=dict(l=0, r=0, t=20, b=0), showlegend=False, hovermode="x unified",
+            xaxis=dict(fixedrange=True), yaxis=dict(fixedrange=True)
+        )
+    with perf.span("render.chart"):
+        st.plotly_chart(fig_port, use_container_width=True, config={'displayModeBar': False})
+
+    st.markdown("### 🧩 Attribution")
+    with perf.span("render.table"):
+        st.dataframe(
+            attribution.sort_values("Total_PL", ascending=False).style.format({
+                "Target Weight": "{:.1f}%", "End Weight": "{:.1f}%",
+                "Market_Value": "${:,.2f}", "Cash_Pocketed": "${:,.2f}", "Income": "${:,.2f}",
+                "Price_PL": "${:+,.2f}", "Total_PL": "${:+,.2f}", "Contribution %": "{:+.2f}%",
+            }),
+            hide_index=True,
             use_container_width=True
         )
+
+
+# >>>>>>>>>>>>>>> MODE G: DISTRIBUTION SCREENER <<<<<<<<<<<<<<<
+elif app_mode == "🔎 Screener":
+    st.markdown("""
+        <div style="margin-top: -10px; margin-bottom: 20px;">
+            <h1 style="font-size: 2.5rem; margin-bottom: 0px; color: #E6EDF3; line-height: 1.2;">
+                🔎 Distribution <span style="color: #8AC7DE;">Screener</span>
+            </h1>
+        </div>
+    """, unsafe_allow_html=True)
+
+    # Every metric is precomputed per ticker in store['screener']; screening is a mask and a sort
+    with perf.span("engine.screen"):
+        table = store['screener']
+        cash_col, drip_col = f"Cash {screen_window} %", f"DRIP {screen_window} %"
+        mask = (table['TTM Yield %'] >= min_yield) & ~(table['NAV Erosion %'] > max_erosion)
+        if screen_frequencies:
+            mask &= table['Frequency'].isin(screen_frequencies)
+        if hide_cuts:
+            mask &= ~table['Cut']
+        sort_col = {"DRIP Return": drip_col, "Cash Return": cash_col}.get(screen_sort, screen_sort)
+        hits = table[mask].sort_values(sort_col, ascending=screen_sort == "NAV Erosion %", na_position='last').reset_index()
+
+    st.markdown(f"### {len(hits)} of {len(table)} Assets, Sorted by {screen_sort}")
+    if hits.empty:
+        st.warning("No assets match these filters.")
+        st.stop()
+
+    percent = st.column_config.NumberColumn(format="%.2f%%")
+    with perf.span("render.table"):
+        st.dataframe(
+            hits,
+            column_order=["Ticker", "Price", "TTM Yield %", "Frequency", "Payouts (TTM)", "Last Payout", "Last Pay Date",
+                          "Income Trend %", "Cut", "NAV Erosion %", cash_col, drip_col, "Inception"],
+            column_config={
+                "Price": st.column_config.NumberColumn(format="$%.2f"),
+                "TTM Yield %": percent,
+                "Last Payout": st.column_config.NumberColumn(format="$%.4f"),
+                "Last Pay Date": st.column_config.DateColumn(),
+                "Income Trend %": st.column_config.NumberColumn(format="%+.1f%%", help="Income over the last quarter vs the quarter before"),
+                "Cut": st.column_config.CheckboxColumn("✂️ Cut"),
+                "NAV Erosion %": st.column_config.NumberColumn(format="%.2f%%", help="Price drop since the first close"),
+                cash_col: st.column_config.NumberColumn(f"💰 Cash {screen_window}", format="%+.2f%%"),
+                drip_col: st.column_config.NumberColumn(f"🔄 DRIP {screen_window}", format="%+.2f%%"),
+                "Inception": st.column_config.DateColumn(),
+            },
+            hide_index=True,
+            use_container_width=True,
+            height=600
+        )
+
+
+# ==========================================
+#        PROFILING LOG & DEBUG PANEL
+# ==========================================
+# Reruns cut short by st.stop() are not recorded
+if rerun.enabled:
+    record = rerun.record()
+    try:
+        perf.write_record(record)
+    except OSError as e:
+        record['log_error'] = str(e)
+    if show_debug:
+        with st.expander("🛠️ Debug: rerun timings"):
+            st.json(record)
+
+if show_debug:
+    with st.expander(f"🛠️ Debug: data quality ({len(store['quality'])} history rows flagged at ingest)"):
+        st.dataframe(store['quality'].groupby(['Issue', 'Action']).size().rename("Rows").reset_index(), hide_index=True)
+        st.dataframe(store['quality'], hide_index=True, use_container_width=True)
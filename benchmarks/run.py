@@ -0,0 +1,251 @@
+# Headless benchmarks against the bundled CSVs. From the repo root:
+#   python -m benchmarks.run [--repeat N] [--output results.json] [--skip-app]
+# Emits one JSON document: environment metadata plus one record per case.
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from income_shield import charts, data, engine, ingest, projection, schema, screener
+
+APP_PATH = os.path.join(data.REPO_DIR, "app.py")
+
+
+def timed(name, fn, repeat, **extra):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        'name': name,
+        'min_ms': round(min(timings), 3),
+        'median_ms': round(statistics.median(timings), 3),
+        'repeat': repeat,
+        **extra,
+    }
+
+
+def read_sheet_default(name, source):
+    # The pre-schema ingest: inferred dtypes, inferred date format
+    df = pd.read_csv(source)
+    date_col = data.SHEETS[name]
+    df[date_col] = pd.to_datetime(df[date_col])
+    return df
+
+
+def bench_load(repeat):
+    results = []
+    for name, source in data.BUNDLED_CSVS.items():
+        before = read_sheet_default(name, source)
+        after = schema.read_sheet(name, source)
+        results.append(timed(f"parse.{name}.default", lambda: read_sheet_default(name, source), repeat,
+                             rows=len(before), memory_mb=round(before.memory_usage(deep=True).sum() / 1e6, 3)))
+        results.append(timed(f"parse.{name}.schema", lambda: schema.read_sheet(name, source), repeat,
+                             rows=len(after), memory_mb=round(after.memory_usage(deep=True).sum() / 1e6, 3)))
+
+    df_u, df_h = data.read_csvs(data.BUNDLED_CSVS)
+    results.append(timed("load.build_store", lambda: data.build_store(df_u, df_h, "bundled"), repeat))
+    df_u_sorted, u_index = data.build_ticker_index(df_u, 'Date')
+    results.append(timed("load.clean_history", lambda: ingest.clean_history(df_h, df_u_sorted, u_index), repeat,
+                         rows=len(df_h)))
+    results.append(timed("load.bundled_csvs", data.load_bundled_store, repeat))
+
+    with tempfile.TemporaryDirectory() as root:
+        store = data.load_bundled_store()
+        data.write_snapshot(store['unified'], store['history_raw'], store['version'], root=root)
+        results.append(timed("load.snapshot", lambda: data.read_snapshot(root=root), repeat))
+    return results
+
+
+def bench_journey(store, repeat):
+    # Longest history in the sheet; short window is its last three months
+    ticker = max(store['unified_index'], key=lambda t: store['unified_index'][t][1] - store['unified_index'][t][0])
+    last = schema.from_day(store['returns'][ticker]['dates'][-1])
+    windows = {
+        'inception': schema.from_day(store['returns'][ticker]['dates'][0]),
+        'short': last - pd.DateOffset(months=3),
+    }
+    results = []
+    for window, start in windows.items():
+        for drip in (False, True):
+            label = f"{window}.{'drip' if drip else 'cash'}"
+            rows = len(data.price_rows(store, ticker, start, last))
+            results.append(timed(f"journey.simulate.{label}",
+                                 lambda: engine.simulate_journey(ticker, start, last, 10.0, drip, store),
+                                 repeat, ticker=ticker, rows=rows))
+            cache = engine.JourneyCache(max_bytes=64 * 1024 * 1024)
+            engine.calculate_journey(ticker, start, last, 1.0, drip, store, cache)
+            results.append(timed(f"journey.cached_scale.{label}",
+                                 lambda: engine.calculate_journey(ticker, start, last, 10.0, drip, store, cache),
+                                 repeat, ticker=ticker, rows=rows))
+            results.append(timed(f"journey.window_summary.{label}",
+                                 lambda: engine.window_summary(store, ticker, start, last, 10.0, drip),
+                                 repeat, ticker=ticker))
+
+    # Every entry date x every holding period in one pass
+    for drip in (False, True):
+        results.append(timed(f"journey.entry_grid.{'drip' if drip else 'cash'}",
+                             lambda: engine.entry_return_grid(store, ticker, drip), repeat,
+                             ticker=ticker, entries=len(store['returns'][ticker]['dates']),
+                             periods=len(engine.HOLDING_PERIODS)))
+    return results
+
+
+def bench_head_to_head(store, repeat):
+    universe = sorted(store['returns'])
+    end = schema.from_day(max(r['dates'][-1] for r in store['returns'].values()))
+    windows = {'1y': end - pd.DateOffset(months=12), 'inception': schema.from_day(store['unified']['Date'].min())}
+
+    def head_to_head(tickers, start, drip):
+        # What the Head-to-Head page computes: every curve plus every leaderboard row
+        curves = engine.calculate_comparison(tickers, start, end, 10000, drip, store)
+        for t in curves.columns:
+            entry = engine.window_entry_price(store, t, start, end)
+            engine.window_summary(store, t, start, end, 10000 / entry, drip)
+        return curves
+
+    results = []
+    for n in (2, 20, len(universe)):
+        tickers = universe[:n]
+        for window, start in windows.items():
+            for drip in (False, True):
+                shape = head_to_head(tickers, start, drip).shape
+                results.append(timed(f"h2h.{n}.{window}.{'drip' if drip else 'cash'}",
+                                     lambda: head_to_head(tickers, start, drip), repeat,
+                                     tickers=n, grid=list(shape)))
+
+    # The 100 longest-listed holdings, half DRIP, from the earliest close
+    holdings = sorted(universe, key=lambda t: store['returns'][t]['dates'][0])[:100]
+    for rebalance in ("Never", "Monthly"):
+        series, _ = engine.simulate_portfolio(holdings, [1] * 100, [True, False] * 50, windows['inception'], end, 10000, store, rebalance)
+        results.append(timed(f"portfolio.100.inception.{rebalance.lower()}",
+                             lambda: engine.simulate_portfolio(holdings, [1] * 100, [True, False] * 50,
+                                                               windows['inception'], end, 10000, store, rebalance),
+                             repeat, holdings=100, rows=len(series)))
+
+    for drip in (False, True):
+        results.append(timed(f"leaderboard.universe.inception.{'drip' if drip else 'cash'}",
+                             lambda: engine.leaderboard_table(store, windows['inception'], end, drip), repeat,
+                             tickers=len(universe)))
+    return results
+
+
+def bench_projection(store, repeat):
+    # 10,000 bootstrapped paths, five years ahead, from the longest history
+    ticker = max(store['returns'], key=lambda t: len(store['returns'][t]['dates']))
+    return [
+        timed(f"projection.10k.5y.{'drip' if drip else 'cash'}",
+              lambda: projection.project_income(store, ticker, 5, drip, paths=10_000), repeat,
+              ticker=ticker, history=len(store['returns'][ticker]['dates']))
+        for drip in (False, True)
+    ]
+
+
+def bench_screener(store, repeat):
+    # The whole-universe metrics table, from scratch and after a one-ticker refresh,
+    # and what the Screener page does with it per rerun
+    built = dict(store)
+    table = store['screener']
+    changed = {sorted(store['returns'])[0]}
+
+    def screen():
+        mask = (table['TTM Yield %'] >= 20) & ~table['Cut'] & ~(table['NAV Erosion %'] > 50)
+        return table[mask].sort_values("DRIP 1Y %", ascending=False, na_position='last')
+
+    return [
+        timed("screener.build.full", lambda: screener.build_screener(built), repeat, tickers=len(table)),
+        timed("screener.build.one_changed", lambda: screener.build_screener(built, table, changed), repeat, tickers=len(table)),
+        timed("screener.filter_sort", screen, repeat, tickers=len(table)),
+    ]
+
+
+def bench_charts(store, repeat):
+    # Head-to-Head figure payloads from inception: every point as SVG vs thinned
+    start = schema.from_day(store['unified']['Date'].min())
+    end = schema.from_day(max(r['dates'][-1] for r in store['returns'].values()))
+    results = []
+    for n in (2, 20, len(store['returns'])):
+        curves = engine.calculate_comparison(sorted(store['returns'])[:n], start, end, 10000, True, store)
+        columns = {t: curves[t].dropna() for t in curves.columns}
+
+        def raw():
+            return go.Figure([go.Scatter(x=c.index, y=c.values, mode='lines', name=t) for t, c in columns.items()])
+
+        def thinned():
+            groups = [(c.index, engine.window_dividend_dates(store, t, start, end), [(c.values, dict(mode='lines', name=t))])
+                      for t, c in columns.items()]
+            return charts.add_lines(go.Figure(), groups)
+
+        for label, build in (("raw", raw), ("thinned", thinned)):
+            fig = build()
+            results.append(timed(f"chart.h2h.{n}.{label}", build, repeat, tickers=n,
+                                 points=sum(len(trace.x) for trace in fig.data),
+                                 payload_bytes=len(pio.to_json(fig, validate=False))))
+    return results
+
+
+def bench_app(repeat):
+    # Full script reruns through Streamlit's headless test harness
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError:
+        return [{'name': "app", 'skipped': "streamlit not installed"}]
+
+    at = AppTest.from_file(APP_PATH, default_timeout=120)
+    at.run()
+    results = [timed("app.rerun.single_asset", lambda: at.run(), repeat)]
+    at.sidebar.radio[0].set_value("⚔️ Head-to-Head").run()
+    results.append(timed("app.rerun.head_to_head", lambda: at.run(), repeat))
+    at.sidebar.radio[0].set_value("🏆 Leaderboard").run()
+    results.append(timed("app.rerun.leaderboard", lambda: at.run(), repeat))
+    errors = [e.value for e in at.exception]
+    if errors:
+        results.append({'name': "app.errors", 'errors': errors})
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Income Shield engine benchmarks")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    parser.add_argument("--skip-app", action="store_true", help="skip the Streamlit end-to-end reruns")
+    args = parser.parse_args(argv)
+
+    store = data.load_bundled_store()
+    results = bench_load(args.repeat) + bench_journey(store, args.repeat) + bench_head_to_head(store, args.repeat)
+    results += bench_projection(store, args.repeat) + bench_screener(store, args.repeat) + bench_charts(store, args.repeat)
+    if not args.skip_app:
+        results += bench_app(args.repeat)
+
+    report = {
+        'meta': {
+            'timestamp': pd.Timestamp.now(tz='UTC').isoformat(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'data_version': store['version'],
+        },
+        'results': results,
+    }
+    text = json.dumps(report, indent=2, default=str)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+# Data loading and compounding engine behind the Income Shield Simulator.
+# Importable without Streamlit: app.py is only the UI on top of this package.
+from .data import load_bundled_store, load_store, new_state, price_rows, dividend_rows
+from .engine import (
+    calculate_journey, simulate_journey, calculate_comparison,
+    window_summary, window_entry_price, window_dividend_dates, leaderboard_table, leaderboard_start,
+    LEADERBOARD_WINDOWS, JourneyCache, entry_return_grid, HOLDING_PERIODS,
+    simulate_portfolio, REBALANCE_MONTHS,
+)
+from .projection import project_income, PROJECTION_BANDS
+from .screener import build_screener, SCREENER_WINDOWS
+
+__all__ = [
+    'load_bundled_store', 'load_store', 'new_state', 'price_rows', 'dividend_rows',
+    'calculate_journey', 'simulate_journey', 'calculate_comparison',
+    'window_summary', 'window_entry_price', 'window_dividend_dates', 'leaderboard_table', 'leaderboard_start',
+    'LEADERBOARD_WINDOWS', 'JourneyCache', 'entry_return_grid', 'HOLDING_PERIODS',
+    'simulate_portfolio', 'REBALANCE_MONTHS', 'project_income', 'PROJECTION_BANDS',
+    'build_screener', 'SCREENER_WINDOWS',
+]
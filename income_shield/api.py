@@ -0,0 +1,263 @@
+# Read-only JSON API over the same engine and data as the app, run as its own
+# process. From the repo root:
+#   python -m income_shield.api [--host 127.0.0.1] [--port 8600]
+# Endpoints (all GET, dates as YYYY-MM-DD):
+#   /version                                   data version, source and ticker count
+#   /tickers                                   every ticker with price data
+#   /quality                                   history rows flagged at ingest and what was done
+#   /summary?ticker=&start=&end=&shares=|amount=&drip=
+#                                              the Single Asset metrics row
+#   /journey?ticker=&start=&end=&shares=|amount=&drip=
+#                                              the day-by-day journey behind it
+#   /leaderboard?window=1M|3M|6M|1Y|YTD|Inception (or start=&end=)&amount=&drip=
+# start defaults to a year ago ("inception" for the ticker's first close), end to
+# today, shares to 10 and amount to $10,000 (leaderboard). Responses are cached per
+# data version and carry an ETag, so a repeat query is a lookup or a bare 304.
+import argparse
+import hashlib
+import json
+import math
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+import pandas as pd
+
+from .cache import VersionedLRU
+from .data import new_state, load_store
+from .engine import (
+    calculate_journey, window_summary, window_entry_price, leaderboard_table, leaderboard_start,
+    LEADERBOARD_WINDOWS,
+)
+from .schema import to_day, from_day
+
+DEFAULT_PORT = 8600
+RESPONSE_CACHE_BYTES = 64 * 1024 * 1024
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# --- QUERY PARAMETERS ---
+def param_date(query, name, default):
+    value = query.get(name)
+    if not value:
+        return default
+    try:
+        return pd.Timestamp(value).normalize()
+    except ValueError:
+        raise ApiError(400, f"{name} is not a date: {value}")
+
+
+def param_number(query, name):
+    value = query.get(name)
+    if not value:
+        return None
+    try:
+        number = float(value)
+    except ValueError:
+        number = math.nan
+    if not math.isfinite(number) or number <= 0:
+        raise ApiError(400, f"{name} must be a positive number: {value}")
+    return number
+
+
+def param_drip(query):
+    return query.get('drip', '').strip().lower() in ('1', 'true', 'yes', 'y')
+
+
+def position(store, query, today):
+    # The Single Asset sidebar: (ticker, buy_date, end_date, initial_shares, dollars, drip).
+    # dollars is None when the position was given as a share count.
+    ticker = query.get('ticker', '')
+    r = store['returns'].get(ticker)
+    if r is None:
+        raise ApiError(404, f"Unknown ticker: {ticker}")
+
+    inception = from_day(r['dates'][0])
+    if query.get('start', '').lower() == 'inception':
+        buy_date = inception
+    else:
+        buy_date = max(param_date(query, 'start', today - pd.DateOffset(months=12)), inception)
+    end_date = param_date(query, 'end', today)
+
+    entry_price = window_entry_price(store, ticker, buy_date, end_date)
+    if entry_price is None:
+        raise ApiError(404, f"No data for {ticker} from {buy_date.date()} to {end_date.date()}")
+    dollars = param_number(query, 'amount')
+    if dollars is not None:
+        return ticker, buy_date, end_date, dollars / entry_price, dollars, param_drip(query)
+    return ticker, buy_date, end_date, param_number(query, 'shares') or 10.0, None, param_drip(query)
+
+
+def position_key(name, ticker, buy_date, end_date, initial_shares, dollars, drip):
+    # Day ordinals, so "today" and an explicit date for the same day share one entry
+    return (name, ticker, to_day(buy_date), to_day(end_date),
+            ('amount', dollars) if dollars is not None else ('shares', initial_shares), drip)
+
+
+# --- RESPONSES ---
+def summary_response(store, ticker, buy_date, end_date, initial_shares, dollars, drip):
+    summary = window_summary(store, ticker, buy_date, end_date, initial_shares, drip)
+    initial_cap = summary['Entry Price'] * initial_shares
+    cash_total = summary['Cash_Pocketed']
+    days_held = (end_date - buy_date).days
+    return {
+        'ticker': ticker,
+        'start_date': summary['Start Date'].date().isoformat(),
+        'end_date': summary['Date'].date().isoformat(),
+        'days_held': days_held,
+        'drip': drip,
+        'entry_price': summary['Entry Price'],
+        'initial_shares': initial_shares,
+        'initial_capital': initial_cap,
+        'end_value': summary['Market_Value'],
+        'end_value_return_pct': (summary['Market_Value'] - initial_cap) / initial_cap * 100,
+        'dividends_collected': cash_total,
+        'shares_gained': summary['Shares'] - initial_shares,
+        # Reinvested payouts have no cash yield, as on the dashboard
+        'annualized_yield_pct': None if drip else (
+            (cash_total / initial_cap) * (365.25 / days_held) * 100 if days_held > 0 else 0.0),
+        'true_total_value': summary['True_Value'],
+        'total_return_pct': (summary['True_Value'] - initial_cap) / initial_cap * 100,
+    }
+
+
+def journey_response(store, ticker, buy_date, end_date, initial_shares, dollars, drip):
+    journey = calculate_journey(ticker, buy_date, end_date, initial_shares, drip, store)
+    journey = journey.assign(Date=journey['Date'].dt.strftime('%Y-%m-%d'))
+    return {
+        'ticker': ticker,
+        'drip': drip,
+        'initial_shares': initial_shares,
+        'rows': journey.astype(object).where(journey.notna(), None).to_dict('records'),
+    }
+
+
+def leaderboard_response(store, buy_date, end_date, amount, drip):
+    # Same rows and scaling as the Leaderboard page, best total return first
+    board = leaderboard_table(store, buy_date, end_date, drip)
+    rows = []
+    if not board.empty:
+        for row in board.sort_values("Total Return", ascending=False).to_dict('records'):
+            rows.append({
+                'ticker': row["Ticker"],
+                'since': row["Since"].isoformat(),
+                'total_return_pct': row["Total Return"],
+                'cash_generated': row["💰 Cash Generated"] * amount,
+                'yield_pct': row["Yield %"],
+                'new_shares_added': row["📈 New Shares Added"] * amount,
+                'share_value': row["📉 Share Value (Remaining)"] * amount,
+                'total_value': row["💚 Total Value"] * amount,
+            })
+    return {
+        'start_date': buy_date.date().isoformat(),
+        'end_date': end_date.date().isoformat(),
+        'amount': amount,
+        'drip': drip,
+        'rows': rows,
+    }
+
+
+def route(store, path, query, today):
+    # -> (cache key, builder of the JSON payload)
+    if path == "/version":
+        return (path,), lambda: {'source': store['source'], 'tickers': len(store['returns'])}
+    if path == "/tickers":
+        return (path,), lambda: {'tickers': sorted(store['returns'])}
+    if path == "/quality":
+        return (path,), lambda: {
+            'issues': store['quality'].groupby('Issue').size().to_dict(),
+            'rows': store['quality'].assign(**{'Date of Pay': store['quality']['Date of Pay'].dt.strftime('%Y-%m-%d')})
+                                    .to_dict('records'),
+        }
+    if path in ("/summary", "/journey"):
+        args = position(store, query, today)
+        build = summary_response if path == "/summary" else journey_response
+        return position_key(path, *args), lambda: build(store, *args)
+    if path == "/leaderboard":
+        window = query.get('window')
+        if window is not None and window not in LEADERBOARD_WINDOWS:
+            raise ApiError(400, f"window must be one of {', '.join(LEADERBOARD_WINDOWS)}")
+        if window:
+            buy_date, end_date = leaderboard_start(window, today, store), today
+        else:
+            buy_date = param_date(query, 'start', today - pd.DateOffset(months=12))
+            end_date = param_date(query, 'end', today)
+        amount, drip = param_number(query, 'amount') or 10000.0, param_drip(query)
+        key = (path, to_day(buy_date), to_day(end_date), amount, drip)
+        return key, lambda: leaderboard_response(store, buy_date, end_date, amount, drip)
+    raise ApiError(404, f"No such endpoint: {path}")
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    # Set by serve(): one data state and one response cache for every request thread
+    state = None
+    cache = None
+
+    def do_GET(self):
+        store, problem = load_store(self.state)
+        if store is None:
+            return self.send_json(503, {'error': problem})
+        url = urlsplit(self.path)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        today = pd.Timestamp.today().normalize()
+        try:
+            key, build = route(store, url.path.rstrip("/") or "/", query, today)
+        except ApiError as e:
+            return self.send_json(e.status, {'error': str(e)})
+
+        # The key is fully resolved (dates as day ordinals), so the ETag is known
+        # before anything is computed and a matching If-None-Match costs nothing
+        etag = '"%s-%s"' % (store['version'], hashlib.sha1(repr(key).encode()).hexdigest()[:16])
+        headers = {'ETag': etag, 'Cache-Control': "no-cache", 'X-Data-Version': store['version']}
+        if etag in [tag.strip() for tag in self.headers.get('If-None-Match', '').split(',')]:
+            return self.send_body(304, b"", headers)
+        body = self.cache.get(store['version'], key, lambda: encode({**build(), 'data_version': store['version']}))
+        self.send_body(200, body, headers)
+
+    def send_json(self, status, payload):
+        self.send_body(status, encode(payload), {'Cache-Control': "no-store"})
+
+    def send_body(self, status, body, headers):
+        self.send_response(status)
+        if status != 304:
+            self.send_header('Content-Type', "application/json")
+            self.send_header('Content-Length', str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def encode(payload):
+    return json.dumps(payload, default=str).encode()
+
+
+def serve(host="127.0.0.1", port=DEFAULT_PORT):
+    ApiHandler.state = new_state()
+    ApiHandler.cache = VersionedLRU(RESPONSE_CACHE_BYTES, len, "response")
+    load_store(ApiHandler.state)
+    server = ThreadingHTTPServer((host, port), ApiHandler)
+    print(f"Income Shield API on http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Income Shield JSON API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+    try:
+        serve(args.host, args.port)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+# Headless scenario runner for scheduled reports. From the repo root:
+#   python -m income_shield.batch scenarios.csv [--output results.csv|.json] [--workers N] [--source local|live]
+# Scenarios are CSV, JSON (a list of objects) or JSON lines, one per row/object:
+#   name       optional label, defaults to the row number
+#   tickers    one ticker, several separated by ';' (or a JSON list); each gets the full position
+#   buy_date   purchase date; the first close on or after it is the entry
+#   sell_date  optional, defaults to today
+#   shares     shares bought at the entry close, or
+#   amount     dollars invested at the entry close (per ticker)
+#   drip       optional, true/false/1/0/yes/no
+# Results are one row per (scenario, ticker) with the end-of-window position, the
+# same numbers as the last row of calculate_journey for that window.
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from .data import read_local, refresh_store, build_store, write_snapshot, read_snapshot
+from .engine import window_summary
+
+RESULT_COLUMNS = [
+    'scenario', 'ticker', 'drip', 'start_date', 'end_date', 'entry_price', 'initial_shares',
+    'shares', 'cash_pocketed', 'market_value', 'true_value', 'total_return_pct', 'error',
+]
+
+# Set in the parent before the pool starts, so forked workers inherit it as is;
+# workers started fresh (spawn) map the parent's Arrow snapshot instead
+_store = None
+
+
+def read_scenarios(path):
+    if path.endswith('.json'):
+        with open(path) as f:
+            rows = json.load(f)
+    elif path.endswith(('.jsonl', '.ndjson')):
+        with open(path) as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    else:
+        rows = pd.read_csv(path, dtype=str, keep_default_na=False).to_dict('records')
+
+    scenarios = []
+    for n, row in enumerate(rows, start=1):
+        tickers = row.get('tickers') or row.get('ticker') or []
+        if isinstance(tickers, str):
+            tickers = [t.strip() for t in tickers.split(';') if t.strip()]
+        scenarios.append({
+            'name': str(row.get('name') or n),
+            'tickers': tickers,
+            'buy_date': row.get('buy_date'),
+            'sell_date': row.get('sell_date') or None,
+            'shares': row.get('shares') or None,
+            'amount': row.get('amount') or None,
+            'drip': str(row.get('drip', '')).strip().lower() in ('1', 'true', 'yes', 'y'),
+        })
+    return scenarios
+
+
+def scenario_date(value, name):
+    # pd.Timestamp gives NaT rather than raising for a blank or missing date
+    date = pd.Timestamp(value)
+    if pd.isna(date):
+        raise ValueError(f"{name} is missing")
+    return date
+
+
+def scenario_size(value, name):
+    size = float(value)
+    if not math.isfinite(size) or size <= 0:
+        raise ValueError(f"{name} must be a positive number: {value}")
+    return size
+
+
+def run_scenario(store, scenario, today):
+    rows = []
+    for ticker in scenario['tickers']:
+        row = {'scenario': scenario['name'], 'ticker': ticker, 'drip': scenario['drip']}
+        try:
+            if ticker not in store['returns']:
+                raise ValueError("unknown ticker")
+            start = scenario_date(scenario['buy_date'], "buy_date")
+            end = scenario_date(scenario['sell_date'], "sell_date") if scenario['sell_date'] else today
+            entry = window_summary(store, ticker, start, end, 1.0, scenario['drip'])
+            if entry is None:
+                raise ValueError("no price data in this window")
+            if scenario['shares'] is not None:
+                initial_shares = scenario_size(scenario['shares'], "shares")
+            elif scenario['amount'] is not None:
+                initial_shares = scenario_size(scenario['amount'], "amount") / entry['Entry Price']
+            else:
+                raise ValueError("needs shares or amount")
+        except (TypeError, ValueError) as e:
+            rows.append({**row, 'error': str(e)})
+            continue
+
+        # Every position column is linear in the share count
+        initial_cap = entry['Entry Price'] * initial_shares
+        rows.append({
+            **row,
+            'start_date': entry['Start Date'].date().isoformat(),
+            'end_date': entry['Date'].date().isoformat(),
+            'entry_price': entry['Entry Price'],
+            'initial_shares': initial_shares,
+            'shares': entry['Shares'] * initial_shares,
+            'cash_pocketed': entry['Cash_Pocketed'] * initial_shares,
+            'market_value': entry['Market_Value'] * initial_shares,
+            'true_value': entry['True_Value'] * initial_shares,
+            'total_return_pct': (entry['True_Value'] * initial_shares - initial_cap) / initial_cap * 100,
+            'error': None,
+        })
+    return rows
+
+
+def init_worker(snapshot_root):
+    global _store
+    if _store is None:
+        df_u, df_h = read_snapshot(snapshot_root)
+        _store = build_store(df_u, df_h, "snapshot")
+
+
+def run_chunk(chunk, today):
+    return [row for scenario in chunk for row in run_scenario(_store, scenario, today)]
+
+
+def run_scenarios(store, scenarios, workers=None, today=None):
+    # Fans chunks of scenarios out over a process pool; workers=1 runs inline
+    global _store
+    today = today or pd.Timestamp.today().normalize()
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(scenarios) < 2 * workers:
+        return [row for scenario in scenarios for row in run_scenario(store, scenario, today)]
+
+    size = math.ceil(len(scenarios) / (workers * 4))
+    chunks = [scenarios[i:i + size] for i in range(0, len(scenarios), size)]
+    _store = store
+    try:
+        with tempfile.TemporaryDirectory() as root:
+            write_snapshot(store['unified'], store['history_raw'], store['version'], root=root)
+            with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(root,)) as pool:
+                results = pool.map(run_chunk, chunks, [today] * len(chunks))
+                return [row for rows in results for row in rows]
+    finally:
+        _store = None
+
+
+def load_source(source):
+    if source == "live":
+        return refresh_store(None, {})
+    (df_u, df_h), origin = read_local()
+    return build_store(df_u, df_h, origin)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run Income Shield scenarios headlessly")
+    parser.add_argument("scenarios", help="CSV, JSON or JSON lines file of scenarios")
+    parser.add_argument("--output", help="write results here (.csv or .json) instead of CSV on stdout")
+    parser.add_argument("--format", choices=("csv", "json"), help="defaults to the output file's extension")
+    parser.add_argument("--workers", type=int, help="processes to use (default: one per CPU)")
+    parser.add_argument("--source", choices=("local", "live"), default="local",
+                        help="local: last snapshot, else the bundled CSVs; live: download the sheets")
+    args = parser.parse_args(argv)
+
+    store = load_source(args.source)
+    results = pd.DataFrame(run_scenarios(store, read_scenarios(args.scenarios), args.workers), columns=RESULT_COLUMNS)
+
+    fmt = args.format or ("json" if args.output and args.output.endswith('.json') else "csv")
+    out = open(args.output, 'w', newline='') if args.output else sys.stdout
+    try:
+        if fmt == "json":
+            out.write(results.to_json(orient='records', indent=2) + "\n")
+        else:
+            results.to_csv(out, index=False)
+    finally:
+        if args.output:
+            out.close()
+    failed = results['error'].notna().sum()
+    print(f"{len(results)} results from {store['source']} data (version {store['version']}), {failed} with errors",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
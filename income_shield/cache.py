@@ -0,0 +1,48 @@
+# The in-process cache policy shared by the engine's journeys and the API's
+# response bodies: least recently used out first, bounded by total bytes, and
+# emptied whenever a new data version is seen.
+import threading
+from collections import OrderedDict
+
+from . import perf
+
+
+class VersionedLRU:
+    # sizeof(value) -> bytes charged against max_bytes; `name` labels the
+    # cache.<name>.hit/miss counters in the perf log
+    def __init__(self, max_bytes, sizeof, name):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.name = name
+        self.version = None
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, version, key, build):
+        with self.lock:
+            if version != self.version:
+                self.entries.clear()
+                self.nbytes = 0
+                self.version = version
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                perf.count(f"cache.{self.name}.hit")
+                return self.entries[key][0]
+            self.misses += 1
+        perf.count(f"cache.{self.name}.miss")
+
+        # Built outside the lock, so a slow miss doesn't hold up other keys
+        value = build()
+        size = self.sizeof(value)
+        with self.lock:
+            if version == self.version and key not in self.entries:
+                self.entries[key] = (value, size)
+                self.nbytes += size
+                while self.nbytes > self.max_bytes and len(self.entries) > 1:
+                    _, (_, evicted) = self.entries.popitem(last=False)
+                    self.nbytes -= evicted
+        return value
@@ -0,0 +1,97 @@
+# Line traces sized for the browser. Long windows are thinned with LTTB before
+# they reach Plotly (dividend sessions and endpoints are always drawn exactly),
+# busy figures switch to WebGL, and the data payload is held under a byte budget.
+import numpy as np
+import plotly.io as pio
+
+from . import perf
+
+MAX_POINTS = 6000           # drawn points per figure, shared out by trace length
+MIN_TRACE_POINTS = 120      # floor per line, before kept points are added back
+WEBGL_POINTS = 3000         # figures drawing more than this use Scattergl
+PAYLOAD_BUDGET = 750_000    # bytes of trace JSON per figure
+
+
+def lttb(x, y, n_out):
+    # Largest-Triangle-Three-Buckets: positions of n_out points that best keep the
+    # line's shape. Endpoints are always picked; one point per bucket in between.
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1])[:max(n_out, 1)]
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / counts
+    mean_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / counts
+    # The last bucket looks ahead to the final point
+    mean_x = np.r_[mean_x[1:], x[-1]]
+    mean_y = np.r_[mean_y[1:], y[-1]]
+
+    picked = np.empty(n_out, dtype=int)
+    picked[0], picked[-1] = 0, n - 1
+    a = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        area = np.abs((x[a] - mean_x[b]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (mean_y[b] - y[a]))
+        a = lo + int(np.argmax(area))
+        picked[b + 1] = a
+    return picked
+
+
+def thin(days, ys, n_out, keep_days=()):
+    # Rows to draw for lines sharing one x axis: each line gets its share of
+    # n_out via LTTB, and every kept day present in `days` is added back
+    n = len(days)
+    if n <= n_out:
+        return np.arange(n)
+    per_line = max(n_out // len(ys), 3)
+    keep = np.searchsorted(days, keep_days)
+    keep = keep[(keep < n) & (days[np.minimum(keep, n - 1)] == keep_days)]
+    picked = [lttb(days, np.asarray(y, dtype=float), per_line) for y in ys]
+    return np.unique(np.concatenate(picked + [keep, [0, n - 1]]))
+
+
+def line_traces(groups, max_points=MAX_POINTS, budget=PAYLOAD_BUDGET):
+    # groups: [(dates, keep_dates, [(y, trace_kwargs), ...]), ...]. Lines in one
+    # group share their dates and are thinned together, so fills between them line up.
+    # Returns trace dicts; scaling every y by one positive factor keeps the same points.
+    groups = [
+        (np.asarray(dates, dtype='datetime64[D]'), np.asarray(keep, dtype='datetime64[D]'), lines)
+        for dates, keep, lines in groups
+    ]
+    total = sum(len(days) for days, _, _ in groups) or 1
+    target = max_points
+    while True:
+        rows = [
+            thin(days.astype(float), [y for y, _ in lines],
+                 max(MIN_TRACE_POINTS, target * len(days) // total), keep.astype(float))
+            for days, keep, lines in groups
+        ]
+        drawn = sum(len(r) * len(lines) for r, (_, _, lines) in zip(rows, groups))
+        # Plain dicts: measuring the payload shouldn't pay for Plotly's validation
+        kind = 'scattergl' if drawn > WEBGL_POINTS else 'scatter'
+        traces = [
+            dict(type=kind, x=np.datetime_as_string(days[r]), y=np.asarray(y)[r], **kwargs)
+            for r, (days, _, lines) in zip(rows, groups)
+            for y, kwargs in lines
+        ]
+        size = len(pio.to_json({'data': traces}, validate=False))
+        # Shrink towards the budget; stop once thinning can't go any lower
+        if size <= budget or target <= MIN_TRACE_POINTS * len(groups):
+            break
+        target = max(int(target * budget / size * 0.9), MIN_TRACE_POINTS * len(groups))
+
+    perf.count("chart.points", drawn)
+    perf.count("chart.payload_bytes", size)
+    if kind == 'scattergl':
+        perf.count("chart.webgl")
+    if size > budget:
+        perf.count("chart.over_budget")
+    return traces
+
+
+def add_lines(fig, groups, max_points=MAX_POINTS, budget=PAYLOAD_BUDGET):
+    fig.add_traces(line_traces(groups, max_points, budget))
+    return fig
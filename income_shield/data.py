@@ -0,0 +1,408 @@
+import hashlib
+import http.client
+import io
+import os
+import random
+import shutil
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from . import perf
+from .ingest import clean_history
+from .screener import build_screener
+from .schema import read_sheet, to_day, price_array, dates_from_days
+
+# --- LOCATIONS ---
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SNAPSHOT_DIR = os.path.join(REPO_DIR, ".snapshot")
+SHEETS = {'unified': 'Date', 'history': 'Date of Pay'}
+# Store key holding each sheet as build_store takes it back: refreshes pass these
+# through unchanged and snapshots save them (the history before cleaning)
+SHEET_FRAMES = {'unified': 'unified', 'history': 'history_raw'}
+SHEET_URLS = {
+    'unified': "https://docs.google.com/spreadsheets/d/e/2PACX-1vSBejJoRecA-lq52GgBYkpqFv7LanUurbzcl4Hqd0QRjufGX-2LSSZjAjPg7DeQ9-Q8o_sc3A9y3739/pub?gid=1848266904&single=true&output=csv",
+    'history': "https://docs.google.com/spreadsheets/d/e/2PACX-1vSBejJoRecA-lq52GgBYkpqFv7LanUurbzcl4Hqd0QRjufGX-2LSSZjAjPg7DeQ9-Q8o_sc3A9y3739/pub?gid=970184313&single=true&output=csv",
+}
+# e.g. point both at a local http.server over the bundled CSVs
+SHEET_URLS = {name: os.environ.get(f"INCOME_SHIELD_{name.upper()}_URL", url) for name, url in SHEET_URLS.items()}
+SNAPSHOT_FORMAT = "v4"  # bump when the ingest schema changes
+REFRESH_SECONDS = 300   # how old the served data may get before a background revalidation
+CONNECT_TIMEOUT = 5     # seconds to connect, and the longest any single read may stall
+READ_TIMEOUT = 30       # seconds for a whole sheet to arrive
+FETCH_ATTEMPTS = 3
+BACKOFF_SECONDS = 0.5   # doubled after every failed attempt, with jitter
+BUNDLED_CSVS = {
+    'unified': os.path.join(REPO_DIR, "The Retail Dividend Investor Spreadsheet - DB_Unified_Data.csv"),
+    'history': os.path.join(REPO_DIR, "The Retail Dividend Investor Spreadsheet - DB_History.csv"),
+}
+
+
+
+# --- PER-TICKER INDEX ---
+def build_ticker_index(df, date_col):
+    # One contiguous, date-sorted block per ticker: {ticker: (first_row, last_row + 1)}
+    df = df.sort_values(['Ticker', date_col], kind='mergesort').reset_index(drop=True)
+    codes = df['Ticker'].cat.codes.to_numpy()
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(df) else np.array([], dtype=int)
+    stops = np.r_[starts[1:], len(df)]
+    names = df['Ticker'].cat.categories
+    return df, {names[codes[s]]: (int(s), int(e)) for s, e in zip(starts, stops)}
+
+
+def ticker_rows(df, index, ticker, date_col, start_date=None, end_date=None):
+    # Binary search inside the ticker's block instead of masking the whole frame
+    first, last = index.get(ticker, (0, 0))
+    dates = df[date_col].to_numpy()[first:last]
+    lo, hi = 0, len(dates)
+    if start_date is not None:
+        lo = np.searchsorted(dates, to_day(start_date, ceil=True), side='left')
+    if end_date is not None:
+        hi = np.searchsorted(dates, to_day(end_date), side='right')
+    return df.iloc[first + lo:first + max(lo, hi)]
+
+
+def price_rows(store, ticker, start_date=None, end_date=None):
+    return ticker_rows(store['unified'], store['unified_index'], ticker, 'Date', start_date, end_date)
+
+
+def dividend_rows(store, ticker, start_date=None, end_date=None):
+    return ticker_rows(store['history'], store['history_index'], ticker, 'Date of Pay', start_date, end_date)
+
+
+def ticker_digests(df, index):
+    # Per-ticker checksum of a ticker-sorted frame, used to spot which tickers a refresh touched
+    if not index:
+        return {}
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    sums = np.add.reduceat(row_hashes, [first for first, _ in index.values()])
+    return dict(zip(index, sums.tolist()))
+
+
+def build_return_index(store, previous=None, changed=()):
+    # Per ticker, prefix products/sums over its dividends (date order) of the DRIP
+    # growth factor and the cash paid per share. Any window is then a ratio/difference.
+    # Tickers outside `changed` reuse their arrays from the `previous` index.
+    u_dates = store['unified']['Date'].to_numpy()
+    u_prices = price_array(store['unified']['Closing Price'])
+    h_dates = store['history']['Date of Pay'].to_numpy()
+    h_amts = store['history']['Amount'].to_numpy(dtype=float)
+
+    index = {}
+    for ticker, (first, last) in store['unified_index'].items():
+        dates, prices = u_dates[first:last], u_prices[first:last]
+        d_first, d_last = store['history_index'].get(ticker, (0, 0))
+        div_dates, div_amts = h_dates[d_first:d_last], h_amts[d_first:d_last]
+
+        if previous is not None and ticker in previous and ticker not in changed:
+            # Same rows as before: only re-point the views at the new frames
+            index[ticker] = {**previous[ticker], 'dates': dates, 'prices': prices, 'div_dates': div_dates, 'div_amts': div_amts}
+            continue
+
+        # Same next-session rule as compound_arrays; payouts past the last close
+        # sit at the tail with pos == len(dates) and are never inside a window
+        pos = np.searchsorted(dates, div_dates, side='left')
+        div_growth = 1.0 + div_amts / prices[np.minimum(pos, len(dates) - 1)]
+        index[ticker] = {
+            'dates': dates,
+            'prices': prices,
+            'div_dates': div_dates,
+            'div_pos': pos,
+            'div_amts': div_amts,
+            'div_growth': div_growth,
+            'growth': np.r_[1.0, np.cumprod(div_growth)],
+            'cash': np.r_[0.0, np.cumsum(div_amts)],
+        }
+    return index
+
+
+def build_catalog(store):
+    # What the sidebar and page header need per ticker, built once per data version:
+    # first and last close, plus the sheet's Underlying/Company if it carries them
+    df = store['unified']
+    tickers = sorted(store['unified_index'])
+    first = [store['unified_index'][t][0] for t in tickers]
+    last = [store['unified_index'][t][1] - 1 for t in tickers]
+    dates = df['Date'].to_numpy()
+    catalog = pd.DataFrame({
+        'Inception': dates_from_days(dates[first]),
+        'Last Close': dates_from_days(dates[last]),
+    }, index=pd.Index(tickers, name='Ticker'))
+    for col in ('Underlying', 'Company'):
+        catalog[col] = df[col].to_numpy()[first] if col in df else "-"
+    return catalog
+
+
+def data_version(store):
+    # Content hash of both sheets; cache keys change only when the data does
+    digest = hashlib.sha1()
+    for name in SHEETS:
+        digest.update(repr(sorted(store[f'{name}_digests'].items())).encode())
+    return digest.hexdigest()[:12]
+
+
+# --- SOURCES & SNAPSHOT ---
+def read_csvs(sources):
+    return read_sheet('unified', sources['unified']), read_sheet('history', sources['history'])
+
+
+class StreamingBody(io.RawIOBase):
+    # An HTTP response as a file for read_csv, so parsing overlaps the download.
+    # Hashes the bytes as they pass and gives up once the body is past its deadline.
+    def __init__(self, resp, deadline):
+        self.resp = resp
+        self.deadline = deadline
+        self.sha1 = hashlib.sha1()
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        if time.monotonic() > self.deadline:
+            raise TimeoutError(f"sheet took longer than {READ_TIMEOUT}s to download")
+        n = self.resp.readinto(b)
+        self.sha1.update(memoryview(b)[:n])
+        return n
+
+
+def download_sheet(name, url, validators):
+    # Conditional GET, parsed while it streams in. Returns (frame, validators),
+    # frame None when the sheet is unchanged.
+    headers = {}
+    if validators.get('etag'):
+        headers['If-None-Match'] = validators['etag']
+    if validators.get('last_modified'):
+        headers['If-Modified-Since'] = validators['last_modified']
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=CONNECT_TIMEOUT) as resp:
+            body = StreamingBody(resp, time.monotonic() + READ_TIMEOUT)
+            df = read_sheet(name, io.BufferedReader(body))
+            fresh = {
+                'etag': resp.headers.get('ETag'),
+                'last_modified': resp.headers.get('Last-Modified'),
+                'sha1': body.sha1.hexdigest(),
+            }
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return None, validators
+        raise
+    # Google's publish endpoint ignores validators; identical bytes still mean no change
+    if fresh['sha1'] == validators.get('sha1'):
+        return None, fresh
+    return df, fresh
+
+
+def fetch_sheet(name, url, validators):
+    # download_sheet with bounded retries: timeouts, dropped connections, 429 and
+    # 5xx are retried with exponential backoff; other HTTP errors are not
+    for attempt in range(FETCH_ATTEMPTS):
+        try:
+            return download_sheet(name, url, validators)
+        except (OSError, http.client.HTTPException) as e:
+            retryable = not isinstance(e, urllib.error.HTTPError) or e.code == 429 or e.code >= 500
+            if not retryable or attempt == FETCH_ATTEMPTS - 1:
+                raise
+            time.sleep(BACKOFF_SECONDS * 2 ** attempt * random.uniform(0.5, 1.5))
+
+
+def write_snapshot(df_u, df_h, version, root=SNAPSHOT_DIR):
+    # Each version gets its own directory; CURRENT is flipped with an atomic
+    # rename so readers never see half of a refresh
+    current = f"{SNAPSHOT_FORMAT}-{version}"
+    target = os.path.join(root, current)
+    os.makedirs(target, exist_ok=True)
+    for name, df in (('unified', df_u), ('history', df_h)):
+        feather.write_feather(df, os.path.join(target, f"{name}.arrow"), compression='uncompressed')
+
+    pointer = os.path.join(root, f"CURRENT.{os.getpid()}.tmp")
+    with open(pointer, 'w') as f:
+        f.write(current)
+    os.replace(pointer, os.path.join(root, "CURRENT"))
+
+    for old in os.listdir(root):
+        if old != current and os.path.isdir(os.path.join(root, old)):
+            shutil.rmtree(os.path.join(root, old), ignore_errors=True)
+
+
+def read_snapshot(root=SNAPSHOT_DIR):
+    # Uncompressed Arrow IPC files, memory-mapped rather than read and parsed
+    with open(os.path.join(root, "CURRENT")) as f:
+        current = f.read().strip()
+    if not current.startswith(f"{SNAPSHOT_FORMAT}-"):
+        raise FileNotFoundError(f"Snapshot {current} predates the current schema")
+    target = os.path.join(root, current)
+    frames = [
+        feather.read_table(os.path.join(target, f"{name}.arrow"), memory_map=True).to_pandas()
+        for name in ('unified', 'history')
+    ]
+    return frames[0], frames[1]
+
+
+def read_local():
+    # Newest saved snapshot, else the CSVs shipped with the repo
+    try:
+        return read_snapshot(), "snapshot"
+    except (OSError, pa.ArrowException):
+        return read_csvs(BUNDLED_CSVS), "bundled"
+
+
+def build_store(df_u, df_h, source, previous=None):
+    # With a `previous` store, sheets passed through unchanged (the same frame
+    # object) keep their index, and only tickers whose rows differ are rebuilt.
+    # The history is kept as parsed and cleaned against the prices (see ingest.py)
+    # whenever either sheet is new, so the quality report always reflects both.
+    store = {'source': source}
+    for name, df in (('unified', df_u), ('history', df_h)):
+        unchanged = previous is not None and df is previous[SHEET_FRAMES[name]]
+        if name == 'history':
+            unchanged = unchanged and store['unified'] is previous['unified']
+            store['history_raw'] = df
+        if unchanged:
+            for key in (name, f'{name}_index', f'{name}_digests'):
+                store[key] = previous[key]
+            if name == 'history':
+                store['quality'] = previous['quality']
+        else:
+            if name == 'history':
+                df, store['quality'] = clean_history(df, store['unified'], store['unified_index'])
+            store[name], store[f'{name}_index'] = build_ticker_index(df, SHEETS[name])
+            store[f'{name}_digests'] = ticker_digests(store[name], store[f'{name}_index'])
+
+    changed = set()
+    if previous is not None:
+        for name in SHEETS:
+            new, old = store[f'{name}_digests'], previous[f'{name}_digests']
+            changed |= {t for t in new.keys() | old.keys() if new.get(t) != old.get(t)}
+    store['changed'] = changed
+    store['returns'] = build_return_index(store, previous['returns'] if previous else None, changed)
+    store['catalog'] = build_catalog(store)
+    store['screener'] = build_screener(store, previous['screener'] if previous else None, changed)
+    store['version'] = data_version(store)
+    return freeze_store(store)
+
+
+def freeze_store(store):
+    # One store object is shared by every session and rerun, so lock it against
+    # in-place edits: read-only arrays, read-only mappings. The frames' column
+    # arrays are already read-only views under pandas copy-on-write.
+    returns = {}
+    for ticker, entry in store['returns'].items():
+        for arr in entry.values():
+            arr.flags.writeable = False
+        returns[ticker] = MappingProxyType(dict(entry))
+
+    frozen = dict(store)
+    frozen['returns'] = MappingProxyType(returns)
+    for name in SHEETS:
+        frozen[f'{name}_index'] = MappingProxyType(dict(store[f'{name}_index']))
+        frozen[f'{name}_digests'] = MappingProxyType(dict(store[f'{name}_digests']))
+    frozen['changed'] = frozenset(store['changed'])
+    return MappingProxyType(frozen)
+
+
+def refresh_store(previous, validators, urls=SHEET_URLS):
+    # Re-download only what the server says changed and merge it into `previous`.
+    # Both sheets are fetched at once; `validators` is only updated once both are in hand.
+    with perf.span("load.fetch"), ThreadPoolExecutor(max_workers=len(SHEETS)) as pool:
+        pending = {
+            name: pool.submit(fetch_sheet, name, urls[name], validators.get(name, {}) if previous else {})
+            for name in SHEETS
+        }
+        results = {name: future.result() for name, future in pending.items()}
+
+    frames, fresh = {}, {}
+    for name, (df, fresh[name]) in results.items():
+        perf.count(f"http.{name}.{'not_modified' if df is None else 'downloaded'}")
+        frames[name] = previous[SHEET_FRAMES[name]] if df is None else df
+
+    if previous is not None and all(frames[name] is previous[SHEET_FRAMES[name]] for name in SHEETS):
+        validators.update(fresh)
+        return previous if previous['source'] == "live" else MappingProxyType({**previous, 'source': "live"})
+
+    with perf.span("load.build_store"):
+        store = build_store(frames['unified'], frames['history'], "live", previous)
+    validators.update(fresh)
+    return store
+
+
+def load_bundled_store():
+    # The CSVs shipped with the repo, no snapshot and no network: for scripts and benchmarks
+    df_u, df_h = read_csvs(BUNDLED_CSVS)
+    return build_store(df_u, df_h, "bundled")
+
+
+# --- PROCESS-WIDE LOADING ---
+def new_state():
+    # The store being served, the sheets' HTTP validators and the background
+    # revalidation's bookkeeping; one per process
+    return {
+        'store': None, 'validators': {}, 'problem': None,
+        'checked_at': None, 'refresh': None, 'lock': threading.Lock(),
+    }
+
+
+def revalidate(state, urls):
+    # Runs off the request path; publishes a new store with one assignment
+    try:
+        store = refresh_store(state['store'], state['validators'], urls)
+        problem = None
+        if store is not state['store'] and store['version'] != (state['store'] or {}).get('version'):
+            try:
+                write_snapshot(store['unified'], store['history_raw'], store['version'])
+            except OSError as e:
+                problem = f"Could not save local snapshot: {str(e)}"
+        state['store'] = store
+    except Exception as e:
+        if state['store'] is None:
+            problem = f"Data loading error: {str(e)}"
+        else:
+            problem = f"Live data unavailable ({str(e)}); showing {state['store']['source']} data."
+    with state['lock']:
+        state['problem'] = problem
+        state['checked_at'] = time.monotonic()
+        state['refresh'] = None
+
+
+def load_store(state, urls=SHEET_URLS, max_age=REFRESH_SECONDS):
+    # Returns (store, problem) without waiting on the network: the current store
+    # is served as is, and once it is older than `max_age` a background thread
+    # revalidates it for later reruns (stale-while-revalidate). `problem` is a
+    # message for the UI or None; the store is None only when nothing at all loaded.
+    with state['lock']:
+        if state['store'] is None and state['checked_at'] is None:
+            # Cold start reads what's on disk; the first revalidation follows right away
+            state['checked_at'] = time.monotonic() - max_age
+            try:
+                with perf.span("load.read_local"):
+                    (df_u, df_h), source = read_local()
+                with perf.span("load.build_store"):
+                    state['store'] = build_store(df_u, df_h, source)
+            except Exception as e:
+                # A snapshot that reads but won't build still leaves the bundled CSVs
+                state['problem'] = f"Could not load local data ({str(e)})"
+                try:
+                    with perf.span("load.build_store"):
+                        state['store'] = load_bundled_store()
+                    state['problem'] += "; using the bundled data."
+                except Exception as e:
+                    state['problem'] += f"; the bundled data failed too ({str(e)})."
+
+        stale = state['store'] is None or time.monotonic() - state['checked_at'] >= max_age
+        if state['refresh'] is None and stale:
+            perf.count("load.revalidate")
+            state['refresh'] = threading.Thread(target=revalidate, args=(state, urls), name="revalidate-sheets", daemon=True)
+            state['refresh'].start()
+        refresh = state['refresh']
+
+    if state['store'] is None and refresh is not None:
+        # Nothing on disk either: the network is the only source, so wait for it
+        refresh.join()
+    return state['store'], state['problem']
@@ -0,0 +1,360 @@
+import numpy as np
+import pandas as pd
+
+from . import data, perf
+from .cache import VersionedLRU
+from .schema import to_day, from_day, days_from_dates, dates_from_days, price_array
+
+
+# --- WINDOW QUERIES (PREFIX-SUM INDEX) ---
+def window_bounds(r, start_date, end_date):
+    # First/last session (inclusive) and the [m_lo, m_hi) run of dividends credited
+    # inside them. Payouts count from the entry session, not the requested start.
+    start, end = to_day(start_date, ceil=True), to_day(end_date)
+    i = np.searchsorted(r['dates'], start, side='left')
+    j = np.searchsorted(r['dates'], end, side='right') - 1
+    m_lo = np.searchsorted(r['div_dates'], r['dates'][i] if i < len(r['dates']) else start, side='left')
+    m_hi = min(np.searchsorted(r['div_pos'], j, side='right'), np.searchsorted(r['div_dates'], end, side='right'))
+    return i, j, m_lo, max(m_lo, m_hi)
+
+
+def window_entry_price(store, ticker, start_date, end_date):
+    # First close inside the window, or None when the ticker has no data there
+    r = store['returns'].get(ticker)
+    if r is None:
+        return None
+    i, j, _, _ = window_bounds(r, start_date, end_date)
+    return r['prices'][i] if j >= i else None
+
+
+def window_dividend_dates(store, ticker, start_date, end_date):
+    # Sessions inside the window that were credited a dividend
+    r = store['returns'].get(ticker)
+    if r is None:
+        return dates_from_days([])
+    _, _, m_lo, m_hi = window_bounds(r, start_date, end_date)
+    return dates_from_days(r['dates'][r['div_pos'][m_lo:m_hi]])
+
+
+def window_summary(store, ticker, start_date, end_date, initial_shares, drip_enabled):
+    # End-of-window position from the prefix arrays, matching the last row of
+    # calculate_journey without simulating the days in between
+    r = store['returns'].get(ticker)
+    if r is None:
+        return None
+    i, j, m_lo, m_hi = window_bounds(r, start_date, end_date)
+    if j < i:
+        return None
+
+    if drip_enabled:
+        shares = initial_shares * r['growth'][m_hi] / r['growth'][m_lo]
+        cash = 0.0
+    else:
+        shares = initial_shares
+        cash = initial_shares * (r['cash'][m_hi] - r['cash'][m_lo])
+
+    market_value = r['prices'][j] * shares
+    return {
+        'Start Date': from_day(r['dates'][i]),
+        'Date': from_day(r['dates'][j]),
+        'Entry Price': r['prices'][i],
+        'Closing Price': r['prices'][j],
+        'Shares': shares,
+        'Cash_Pocketed': cash,
+        'Market_Value': market_value,
+        'True_Value': market_value + cash,
+    }
+
+
+# --- COMPOUNDING ENGINE ---
+def compound_arrays(dates, prices, div_dates, div_amts, initial_shares, drip_enabled):
+    # Dividends paid on a day with no close (weekend, holiday, sheet gap) land on
+    # the next available session. Anything paid before the entry session or after
+    # the last close is dropped.
+    held = div_dates >= dates[0]
+    pos = np.searchsorted(dates, div_dates[held], side='left')
+    keep = pos < len(dates)
+    pos, div_amts = pos[keep], div_amts[held][keep]
+
+    if drip_enabled:
+        # Each payout buys amt / price new shares per share held -> a growth factor
+        growth = np.ones(len(dates))
+        np.multiply.at(growth, pos, 1.0 + div_amts / prices[pos])
+        shares = initial_shares * np.cumprod(growth)
+        cash = np.zeros(len(dates))
+    else:
+        # Share count never changes, so cash is just a running sum of per-share payouts
+        per_share = np.zeros(len(dates))
+        np.add.at(per_share, pos, div_amts)
+        shares = np.full(len(dates), initial_shares)
+        cash = initial_shares * np.cumsum(per_share)
+
+    return shares, cash
+
+
+def simulate_journey(ticker, start_date, end_date, initial_shares, drip_enabled, store):
+    journey = data.price_rows(store, ticker, start_date, end_date).copy()
+    
+    if journey.empty:
+        return journey
+        
+    relevant_divs = data.dividend_rows(store, ticker, start_date, end_date)
+    
+    journey = journey[['Date'] + [c for c in journey.columns if c != 'Date']].reset_index(drop=True)
+    journey['Closing Price'] = price_array(journey['Closing Price'])
+    shares, cash = compound_arrays(
+        journey['Date'].to_numpy(), journey['Closing Price'].to_numpy(),
+        relevant_divs['Date of Pay'].to_numpy(), relevant_divs['Amount'].to_numpy(dtype=float),
+        initial_shares, drip_enabled
+    )
+    journey['Date'] = dates_from_days(journey['Date'])
+    journey['Shares'] = shares
+    journey['Cash_Pocketed'] = cash
+
+    journey['Market_Value'] = journey['Closing Price'] * journey['Shares']
+    
+    # Base Value = What your initial shares are worth today (No DRIP, No Cash)
+    journey['Base_Asset_Value'] = journey['Closing Price'] * initial_shares
+
+    if drip_enabled:
+        journey['True_Value'] = journey['Market_Value']
+    else:
+        journey['True_Value'] = journey['Market_Value'] + journey['Cash_Pocketed']
+    
+    return journey
+
+
+# Columns proportional to initial_shares, with or without DRIP
+SCALED_COLUMNS = ['Shares', 'Cash_Pocketed', 'Market_Value', 'Base_Asset_Value', 'True_Value']
+
+
+def frame_bytes(df):
+    return int(df.memory_usage(index=True).sum())
+
+
+class JourneyCache(VersionedLRU):
+    # Unit-share (initial_shares=1) journeys, charged by their frames' memory
+    def __init__(self, max_bytes):
+        super().__init__(max_bytes, frame_bytes, "journey")
+
+
+JOURNEY_CACHE = JourneyCache(max_bytes=64 * 1024 * 1024)
+
+
+def calculate_journey(ticker, start_date, end_date, initial_shares, drip_enabled, store, cache=JOURNEY_CACHE):
+    # Simulate one share once per (ticker, window, DRIP) and scale it, so changing
+    # the position size is a multiply. Day ordinals keep "today" reruns on one key.
+    key = (ticker, to_day(start_date, ceil=True), to_day(end_date), drip_enabled)
+
+    def build():
+        with perf.span("engine.simulate"):
+            return simulate_journey(ticker, start_date, end_date, 1.0, drip_enabled, store)
+
+    unit = cache.get(store['version'], key, build)
+    return unit.assign(**{col: unit[col] * initial_shares for col in SCALED_COLUMNS if col in unit})
+
+
+# --- MULTI-ASSET ENGINE ---
+def aligned_window(tickers, start_date, end_date, store):
+    # Every ticker with a close in the window, on the union of their session dates:
+    # (tickers, days, closes, paid, growth) where closes is NaN where a ticker has
+    # no close, paid is cash per share credited and growth the DRIP factor per row
+    spans = []
+    for t in tickers:
+        r = store['returns'].get(t)
+        if r is None:
+            continue
+        i, j, m_lo, m_hi = window_bounds(r, start_date, end_date)
+        if j >= i:
+            spans.append((t, r, i, j + 1, m_lo, m_hi))
+    if not spans:
+        return [], np.array([], dtype=np.int32), np.empty((0, 0)), np.empty((0, 0)), np.empty((0, 0))
+
+    # Scatter every ticker's closes onto the union of their session dates
+    n_rows = np.array([j - i for _, _, i, j, _, _ in spans])
+    cols = np.repeat(np.arange(len(spans)), n_rows)
+    grid, rows = np.unique(np.concatenate([r['dates'][i:j] for _, r, i, j, _, _ in spans]), return_inverse=True)
+    prices = np.full((len(grid), len(spans)), np.nan)
+    prices[rows, cols] = np.concatenate([r['prices'][i:j] for _, r, i, j, _, _ in spans])
+
+    # Each dividend lands on the grid row of the session it was credited to
+    n_divs = np.array([m_hi - m_lo for _, _, _, _, m_lo, m_hi in spans])
+    div_cells = (
+        np.searchsorted(grid, np.concatenate([r['dates'][r['div_pos'][m_lo:m_hi]] for _, r, _, _, m_lo, m_hi in spans])),
+        np.repeat(np.arange(len(spans)), n_divs),
+    )
+    paid = np.zeros(prices.shape)
+    np.add.at(paid, div_cells, np.concatenate([r['div_amts'][m_lo:m_hi] for _, r, _, _, m_lo, m_hi in spans]))
+    growth = np.ones(prices.shape)
+    np.multiply.at(growth, div_cells, np.concatenate([r['div_growth'][m_lo:m_hi] for _, r, _, _, m_lo, m_hi in spans]))
+    return [t for t, *_ in spans], grid, prices, paid, growth
+
+
+def calculate_comparison(tickers, start_date, end_date, amount, drip_enabled, store):
+    # Total_Return_Pct for every ticker on one date x ticker grid. Each ticker buys
+    # `amount` at its first close in the window; cells where it has no close are NaN.
+    found, grid, prices, paid, growth = aligned_window(tickers, start_date, end_date, store)
+    if not found:
+        return pd.DataFrame()
+
+    first = np.argmax(~np.isnan(prices), axis=0)
+    initial_shares = amount / prices[first, np.arange(len(found))]
+    if drip_enabled:
+        true_value = prices * (initial_shares * np.cumprod(growth, axis=0))
+    else:
+        true_value = (prices + np.cumsum(paid, axis=0)) * initial_shares
+
+    return pd.DataFrame(
+        (true_value - amount) / amount * 100,
+        index=dates_from_days(grid).rename('Date'),
+        columns=found
+    )
+
+
+# --- PORTFOLIO ---
+REBALANCE_MONTHS = {"Never": 0, "Monthly": 1, "Quarterly": 3, "Annually": 12}
+
+
+def simulate_portfolio(tickers, weights, drip_flags, start_date, end_date, amount, store, rebalance="Never"):
+    # `amount` split by target weight across the holdings, bought at the first
+    # session where every one of them has a close. Each holding reinvests or pockets
+    # its own payouts; on a schedule, at the first session of each new period, the
+    # market value (pocketed cash stays out) is reset to the target weights at the
+    # close, before that day's payouts. Holdings without data in the window are dropped.
+    # Returns (series, attribution): daily Market_Value/Cash_Pocketed/True_Value/Income
+    # and one row per holding.
+    found, grid, prices, paid, growth = aligned_window(tickers, start_date, end_date, store)
+    if not found:
+        return pd.DataFrame(), pd.DataFrame()
+    spec = dict(zip(tickers, zip(weights, drip_flags)))
+    w = np.array([spec[t][0] for t in found], dtype=float)
+    drip = np.array([bool(spec[t][1]) for t in found])
+    if w.sum() <= 0:
+        return pd.DataFrame(), pd.DataFrame()
+    w = w / w.sum()
+
+    # Start once every holding has a close; carry the last close over sessions it misses
+    start = np.argmax(~np.isnan(prices), axis=0).max()
+    last_close = np.where(~np.isnan(prices), np.arange(len(grid))[:, None], 0)
+    prices = prices[np.maximum.accumulate(last_close, axis=0), np.arange(len(found))][start:]
+    grid, paid, growth = grid[start:], paid[start:], growth[start:]
+
+    # Per holding and row: cumulative DRIP factor up to the row (G), and before it
+    # (Gx); cumulative cash paid per share held since the start (C), and before it (Cx)
+    growth = np.where(drip, growth, 1.0)
+    G = np.cumprod(growth, axis=0)
+    Gx = np.r_[np.ones((1, len(found))), G[:-1]]
+    C = np.cumsum(np.where(drip, 0.0, paid), axis=0)
+    Cx = np.r_[np.zeros((1, len(found))), C[:-1]]
+
+    # Rows where a new holding period begins; shares only change between them by DRIP
+    months = dates_from_days(grid).values.astype('datetime64[M]').astype(np.int64)
+    every = REBALANCE_MONTHS[rebalance]
+    period = (months - months[0]) // every if every else np.zeros(len(grid), dtype=np.int64)
+    seg_rows = np.flatnonzero(np.r_[True, period[1:] != period[:-1]])
+    seg_id = np.cumsum(np.r_[True, period[1:] != period[:-1]]) - 1
+
+    # Shares and pocketed cash at the start of each period, one K-vector per period
+    seg_shares = np.empty((len(seg_rows), len(found)))
+    seg_cash = np.zeros((len(seg_rows), len(found)))
+    seg_shares[0] = amount * w / prices[0]
+    for s in range(1, len(seg_rows)):
+        r, p = seg_rows[s], seg_rows[s - 1]
+        held = seg_shares[s - 1] * Gx[r] / Gx[p]
+        seg_cash[s] = seg_cash[s - 1] + seg_shares[s - 1] * (Cx[r] - Cx[p])
+        seg_shares[s] = (held * prices[r]).sum() * w / prices[r]
+
+    # Expand to every row: shares before and after the day's payouts, cash so far
+    base = seg_rows[seg_id]
+    pre = seg_shares[seg_id] * Gx / Gx[base]
+    shares = pre * growth
+    cash = seg_cash[seg_id] + seg_shares[seg_id] * (C - Cx[base])
+    income = np.where(drip, (shares - pre) * prices, pre * paid)
+    price_pl = np.r_[np.zeros((1, len(found))), shares[:-1] * np.diff(prices, axis=0)]
+
+    market = shares * prices
+    series = pd.DataFrame({
+        'Market_Value': market.sum(axis=1),
+        'Cash_Pocketed': cash.sum(axis=1),
+        'Income': np.cumsum(income.sum(axis=1)),
+    }, index=dates_from_days(grid).rename('Date'))
+    series['True_Value'] = series['Market_Value'] + series['Cash_Pocketed']
+
+    attribution = pd.DataFrame({
+        'Ticker': found,
+        'Target Weight': w * 100,
+        'DRIP': drip,
+        'End Weight': market[-1] / market[-1].sum() * 100,
+        'Market_Value': market[-1],
+        'Cash_Pocketed': cash[-1],
+        'Income': income.sum(axis=0),
+        'Price_PL': price_pl.sum(axis=0),
+    })
+    attribution['Total_PL'] = attribution['Price_PL'] + attribution['Income']
+    attribution['Contribution %'] = attribution['Total_PL'] / amount * 100
+    return series, attribution
+
+
+# --- ENTRY TIMING GRID ---
+HOLDING_PERIODS = {"1M": 1, "3M": 3, "6M": 6, "1Y": 12, "2Y": 24, "3Y": 36}
+
+
+def entry_return_grid(store, ticker, drip_enabled, periods=HOLDING_PERIODS):
+    # Total return (%) of buying at every session's close and holding for each
+    # period: one row per entry date, one column per period. Same window rules as
+    # window_summary; holds that would end after the last close are NaN.
+    r = store['returns'].get(ticker)
+    if r is None:
+        return pd.DataFrame()
+    entries = dates_from_days(r['dates'])
+    starts = r['dates'][:, None]
+    ends = np.column_stack([days_from_dates(entries + pd.DateOffset(months=m)) for m in periods.values()])
+
+    j = np.searchsorted(r['dates'], ends, side='right') - 1
+    m_lo = np.searchsorted(r['div_dates'], starts, side='left')
+    m_hi = np.maximum(m_lo, np.minimum(
+        np.searchsorted(r['div_pos'], j, side='right'), np.searchsorted(r['div_dates'], ends, side='right')
+    ))
+    if drip_enabled:
+        value = r['prices'][j] * r['growth'][m_hi] / r['growth'][m_lo]
+    else:
+        value = r['prices'][j] + r['cash'][m_hi] - r['cash'][m_lo]
+
+    pct = (value / r['prices'][:, None] - 1) * 100
+    pct[ends > r['dates'][-1]] = np.nan
+    return pd.DataFrame(pct, index=entries.rename('Date'), columns=list(periods))
+
+
+# --- UNIVERSE LEADERBOARD ---
+LEADERBOARD_WINDOWS = ["1M", "3M", "6M", "1Y", "YTD", "Inception"]
+
+
+def leaderboard_start(window, today, store):
+    if window == "YTD":
+        return pd.Timestamp(today.year, 1, 1)
+    if window == "Inception":
+        # Earliest close in the sheet, so every ticker starts at its own first close
+        return from_day(store['unified']['Date'].min())
+    months = {"1M": 1, "3M": 3, "6M": 6, "1Y": 12}[window]
+    return today - pd.DateOffset(months=months)
+
+
+def leaderboard_table(store, start_date, end_date, drip_enabled):
+    # Every ticker per $1 invested at its first close in the window; callers scale by the amount
+    rows = []
+    for t in sorted(store['returns']):
+        s = window_summary(store, t, start_date, end_date, 1.0, drip_enabled)
+        if s is None:
+            continue
+        per_dollar = 1.0 / s['Entry Price']
+        rows.append({
+            "Ticker": t,
+            "Since": s['Start Date'].date(),
+            "Total Return": (s['True_Value'] * per_dollar - 1.0) * 100,
+            "💰 Cash Generated": s['Cash_Pocketed'] * per_dollar,
+            "Yield %": s['Cash_Pocketed'] * per_dollar * 100,
+            "📈 New Shares Added": (s['Shares'] - 1.0) * per_dollar,
+            "📉 Share Value (Remaining)": s['Market_Value'] * per_dollar,
+            "💚 Total Value": s['True_Value'] * per_dollar,
+        })
+    return pd.DataFrame(rows)
@@ -0,0 +1,83 @@
+# Cleanup of the dividend history, run by build_store whenever a new history or
+# price sheet comes in (snapshots hold the history as parsed, so a cold start
+# rebuilds the same report). The engine only ever sees the result: every
+# payout is unique per (ticker, pay date), positive, paid on or after the
+# ticker's first close and plausible against its price, and the frame is sorted
+# by ticker and pay date. Everything fixed or dropped goes in a quality report.
+import numpy as np
+import pandas as pd
+
+from .schema import dates_from_days, price_array
+
+TIMESTAMP_FORMAT = '%m/%d/%Y'
+MAX_PAYOUT_RATIO = 0.5   # one payout above half the last close is a sheet error, not a distribution
+ROUNDING = 0.005         # duplicates this close are one payout quoted at different precision
+TYPE_PRIORITY = {'Dividend': 0, 'Backfill': 1}   # of duplicates, keep the announced payout
+QUALITY_COLUMNS = ['Ticker', 'Date of Pay', 'Amount', 'Type', 'Issue', 'Action', 'Detail']
+
+
+def issue_rows(df, mask, issue, action, detail):
+    # detail: one string for every row, or one per row in `mask`
+    if not mask.any():
+        return None
+    rows = df.loc[mask, ['Ticker', 'Date of Pay', 'Amount', 'Type']].astype({'Ticker': str, 'Type': str})
+    return rows.assign(Issue=issue, Action=action, Detail=detail)
+
+
+def clean_history(df_h, df_u, u_index):
+    # -> (cleaned history, quality report with one row per affected payout)
+    df = df_h.reset_index(drop=True)
+    issues = []
+
+    # Types: trimmed and case-folded, so 'Dividend ' and 'Dividend' are one category
+    raw = df['Type'].astype('string')
+    df['Type'] = raw.str.strip().str.capitalize().astype('category')
+    renamed = (raw != df['Type'].astype('string')).fillna(False).to_numpy()
+    issues.append(issue_rows(df, renamed, "type normalized", "fixed", [f"was {t!r}" for t in raw[renamed]]))
+
+    stamped = pd.to_datetime(df['Timestamp'].astype('string'), format=TIMESTAMP_FORMAT, errors='coerce')
+    issues.append(issue_rows(df, stamped.isna().to_numpy(), "missing timestamp", "kept", "blank or unparseable"))
+
+    # Each payout against the ticker's last close on or before its pay date
+    pay_days = df['Date of Pay'].to_numpy()
+    amounts = df['Amount'].to_numpy(dtype=float)
+    close = np.full(len(df), np.nan)
+    early = np.zeros(len(df), dtype=bool)
+    u_dates, u_prices = df_u['Date'].to_numpy(), price_array(df_u['Closing Price'])
+    for ticker, rows in df.groupby('Ticker', observed=True).indices.items():
+        first, last = u_index.get(ticker, (0, 0))
+        if last == first:
+            continue
+        pos = np.searchsorted(u_dates[first:last], pay_days[rows], side='right') - 1
+        early[rows] = pos < 0
+        close[rows] = u_prices[first:last][np.maximum(pos, 0)]
+    ratio = amounts / close
+
+    unpriced = np.isnan(close)
+    issues.append(issue_rows(df, unpriced, "no prices", "kept", "ticker has no closes to check against"))
+    # A window's entry is its first close, so nothing paid before it can be held
+    issues.append(issue_rows(df, early, "before first close", "dropped", "paid before the ticker's first close"))
+    bad_amount = ~(amounts > 0)
+    issues.append(issue_rows(df, bad_amount, "non-positive amount", "dropped", "amount must be above zero"))
+    implausible = ~early & ~bad_amount & (ratio > MAX_PAYOUT_RATIO)
+    issues.append(issue_rows(df, implausible, "implausible amount", "dropped",
+                             [f"{r:.0%} of the {c:.2f} close" for r, c in zip(ratio[implausible], close[implausible])]))
+
+    # Duplicates: the announced payout wins over a backfill, then the latest timestamp
+    df = df.assign(_priority=df['Type'].map(TYPE_PRIORITY).astype(float).fillna(len(TYPE_PRIORITY)), _stamp=stamped)
+    df = df[~(early | bad_amount | implausible)]
+    df = df.sort_values(['Ticker', 'Date of Pay', '_priority', '_stamp'], ascending=[True, True, True, False],
+                        na_position='last', kind='mergesort')
+    dup = df.duplicated(['Ticker', 'Date of Pay']).to_numpy()
+    # Sorted, so each dropped duplicate's kept payout is the last row not dropped before it
+    winner = np.maximum.accumulate(np.where(dup, 0, np.arange(len(df))))
+    kept, kept_type = df['Amount'].to_numpy()[winner], df['Type'].astype(str).to_numpy()[winner]
+    conflict = dup & (np.abs(df['Amount'].to_numpy() - kept) > ROUNDING)
+    for mask, issue in ((dup & ~conflict, "duplicate"), (conflict, "conflicting duplicate")):
+        issues.append(issue_rows(df, mask, issue, "dropped", [f"kept {a:g} ({t})" for a, t in zip(kept[mask], kept_type[mask])]))
+
+    clean = df[~dup].drop(columns=['_priority', '_stamp']).reset_index(drop=True)
+    quality = pd.concat([i for i in issues if i is not None] or [pd.DataFrame(columns=QUALITY_COLUMNS)])
+    quality = quality.sort_values(['Ticker', 'Date of Pay'], kind='mergesort').reset_index(drop=True)
+    quality['Date of Pay'] = dates_from_days(quality['Date of Pay'].to_numpy())
+    return clean, quality[QUALITY_COLUMNS]
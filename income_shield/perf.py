@@ -0,0 +1,77 @@
+# Opt-in per-rerun timings. The app activates one PerfRecorder per script run on
+# its thread; the package reports spans and counters to whichever is active there.
+# With nothing active (or a disabled recorder) every call is a cheap no-op.
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+PERF_ENABLED = os.environ.get("INCOME_SHIELD_PERF", "") not in ("", "0")
+PERF_LOG = os.environ.get("INCOME_SHIELD_PERF_LOG", os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "perf_log.jsonl"))
+
+_local = threading.local()
+_log_lock = threading.Lock()
+
+
+class PerfRecorder:
+    def __init__(self, enabled=True, **context):
+        self.enabled = enabled
+        self.context = context
+        self.spans = {}     # name -> [total_ms, calls]
+        self.counters = {}
+        self.started = time.perf_counter()
+
+    def activate(self):
+        _local.recorder = self
+        return self
+
+    @contextmanager
+    def span(self, name):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            total = self.spans.setdefault(name, [0.0, 0])
+            total[0] += elapsed
+            total[1] += 1
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def record(self):
+        return {
+            'ts': time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            **self.context,
+            'total_ms': round((time.perf_counter() - self.started) * 1000, 3),
+            'spans': {name: {'ms': round(ms, 3), 'calls': calls} for name, (ms, calls) in self.spans.items()},
+            'counters': dict(self.counters),
+        }
+
+
+_DISABLED = PerfRecorder(enabled=False)
+
+
+def current():
+    return getattr(_local, 'recorder', _DISABLED)
+
+
+def span(name):
+    return current().span(name)
+
+
+def count(name, n=1):
+    current().count(name, n)
+
+
+def write_record(record, path=PERF_LOG):
+    # One JSON object per line; sessions share the file, so appends are serialized
+    line = json.dumps(record, default=str)
+    with _log_lock, open(path, 'a') as f:
+        f.write(line + "\n")
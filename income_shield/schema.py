@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+
+# --- COMPACT INGEST SCHEMA ---
+# Tickers and types are categoricals, dates are int32 days since 1970-01-01,
+# closes are float32 (the sheet quotes them in cents, so rounding back to
+# PRICE_DECIMALS on decode recovers the exact value). The no-DRIP running total
+# and dividend amounts carry more decimals than that, so they stay float64.
+SCHEMA = {
+    'unified': {
+        'dates': {'Date': '%Y-%m-%d'},
+        'dtypes': {
+            'Ticker': 'category',
+            'Closing Price': 'float32',
+            'Price + All Divs Received (No DRIP)': 'float64',
+        },
+    },
+    'history': {
+        'dates': {'Date of Pay': '%m/%d/%Y'},
+        'dtypes': {
+            'Timestamp': 'category',
+            'Ticker': 'category',
+            'Amount': 'float64',
+            'Type': 'category',
+        },
+    },
+}
+PRICE_DECIMALS = 2
+EPOCH = pd.Timestamp("1970-01-01")
+
+
+def read_sheet(name, source):
+    schema = SCHEMA[name]
+    dtypes = {**schema['dtypes'], **{col: 'str' for col in schema['dates']}}
+    df = pd.read_csv(source, dtype=dtypes)
+    for col, fmt in schema['dates'].items():
+        df[col] = days_from_dates(pd.to_datetime(df[col], format=fmt))
+    for col, dtype in schema['dtypes'].items():
+        if dtype == 'category':
+            # Sorted categories so sorting by code is sorting by name
+            if not df[col].cat.categories.is_monotonic_increasing:
+                df[col] = df[col].cat.reorder_categories(sorted(df[col].cat.categories))
+    return df
+
+
+def days_from_dates(dates):
+    return pd.DatetimeIndex(dates).values.astype('datetime64[D]').astype(np.int32)
+
+
+def dates_from_days(days):
+    return pd.DatetimeIndex(EPOCH + pd.to_timedelta(np.asarray(days, dtype=np.int64), unit='D'))
+
+
+def to_day(value, ceil=False):
+    # Day ordinal of a timestamp. With ceil, a time past midnight rounds up, so
+    # `day >= to_day(start, ceil=True)` matches `date >= start` for midnight dates.
+    ts = pd.Timestamp(value)
+    day = (ts.normalize() - EPOCH).days
+    return day + 1 if ceil and ts != ts.normalize() else day
+
+
+def from_day(day):
+    return EPOCH + pd.Timedelta(days=int(day))
+
+
+def price_array(prices):
+    return np.round(np.asarray(prices, dtype=np.float64), PRICE_DECIMALS)
@@ -0,0 +1,75 @@
+# Per-ticker distribution metrics for the screener, built into the store at ingest.
+# Every figure is as of the ticker's own last close, so a row only changes when
+# that ticker's rows do and a refresh recomputes just the changed tickers.
+import numpy as np
+import pandas as pd
+
+from .engine import window_summary
+from .schema import from_day
+
+SCREENER_WINDOWS = {"3M": 3, "6M": 6, "1Y": 12, "Inception": None}
+# Median days between recent payouts -> cadence; anything longer is Annual
+FREQUENCIES = [(10, "Weekly"), (20, "Biweekly"), (45, "Monthly"), (100, "Quarterly"), (200, "Semiannual")]
+FREQUENCY_PAYOUTS = 13   # recent payouts the cadence is read from
+TREND_DAYS = 91          # income over the last quarter vs the quarter before
+CUT_THRESHOLD = 0.25     # a payout this far below the median of the ones before it is a cut
+CUT_LOOKBACK = 6
+
+
+def frequency(paid_days):
+    if len(paid_days) < 2:
+        return "None" if len(paid_days) == 0 else "Irregular"
+    gap = np.median(np.diff(paid_days[-FREQUENCY_PAYOUTS:]))
+    return next((label for days, label in FREQUENCIES if gap <= days), "Annual")
+
+
+def ticker_metrics(store, ticker):
+    r = store['returns'][ticker]
+    last_day, price = int(r['dates'][-1]), r['prices'][-1]
+    # Payouts dated after the last close aren't in any window yet
+    paid = r['div_dates'] <= last_day
+    paid_days, amounts = r['div_dates'][paid], r['div_amts'][paid]
+
+    ttm = paid_days > last_day - 365
+    recent = amounts[paid_days > last_day - TREND_DAYS].sum()
+    prior = amounts[(paid_days > last_day - 2 * TREND_DAYS) & (paid_days <= last_day - TREND_DAYS)].sum()
+    before = amounts[-CUT_LOOKBACK - 1:-1]
+
+    row = {
+        'Ticker': ticker,
+        'Inception': from_day(r['dates'][0]),
+        'As Of': from_day(last_day),
+        'Price': price,
+        'TTM Yield %': amounts[ttm].sum() / price * 100,
+        'Frequency': frequency(paid_days),
+        'Payouts (TTM)': int(ttm.sum()),
+        'Last Payout': amounts[-1] if len(amounts) else np.nan,
+        'Last Pay Date': from_day(paid_days[-1]) if len(paid_days) else pd.NaT,
+        'Income Trend %': (recent / prior - 1) * 100 if prior > 0 else np.nan,
+        'Cut': bool(len(before) and amounts[-1] < (1 - CUT_THRESHOLD) * np.median(before)),
+        'NAV Erosion %': (1 - price / r['prices'][0]) * 100,
+    }
+
+    # DRIP vs cash total return per $1, for windows the ticker has the history for
+    end = from_day(last_day)
+    for window, months in SCREENER_WINDOWS.items():
+        start = row['Inception'] if months is None else end - pd.DateOffset(months=months)
+        for drip in (False, True):
+            col = f"{'DRIP' if drip else 'Cash'} {window} %"
+            s = window_summary(store, ticker, start, end, 1.0, drip) if start >= row['Inception'] else None
+            row[col] = (s['True_Value'] / s['Entry Price'] - 1) * 100 if s is not None else np.nan
+    return row
+
+
+def build_screener(store, previous=None, changed=()):
+    # One row per ticker with prices. Rows of tickers outside `changed` are
+    # carried over from the `previous` table instead of recomputed.
+    tickers = sorted(store['returns'])
+    if previous is None:
+        kept = pd.DataFrame()
+        todo = tickers
+    else:
+        kept = previous[previous.index.isin(tickers) & ~previous.index.isin(list(changed))]
+        todo = [t for t in tickers if t not in kept.index]
+    fresh = pd.DataFrame([ticker_metrics(store, t) for t in todo]).set_index('Ticker') if todo else pd.DataFrame()
+    return pd.concat([kept, fresh]).sort_index() if len(kept) else fresh
@@ -0,0 +1,44 @@
+import pytest
+
+from income_shield import data
+from income_shield.batch import read_scenarios, run_scenarios
+
+SCENARIOS = """name,tickers,buy_date,sell_date,shares,amount,drip
+good,NVDY,2025-01-02,2025-06-30,10,,false
+good_amount,MSTY,2025-01-02,,,5000,true
+no_buy_date,NVDY,,,10,,false
+bad_sell_date,NVDY,2025-01-02,someday,10,,false
+zero_shares,NVDY,2025-01-02,,0,,false
+negative_shares,NVDY,2025-01-02,,-5,,false
+negative_amount,NVDY,2025-01-02,,,-1000,false
+nan_amount,NVDY,2025-01-02,,,nan,false
+"""
+ERRORS = {
+    'no_buy_date': "buy_date is missing",
+    'zero_shares': "shares must be a positive number: 0",
+    'negative_shares': "shares must be a positive number: -5",
+    'negative_amount': "amount must be a positive number: -1000",
+    'nan_amount': "amount must be a positive number: nan",
+}
+
+
+@pytest.fixture(scope="module")
+def store():
+    return data.load_bundled_store()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_bad_rows_fail_alone(store, tmp_path, workers):
+    # workers=2 with this many scenarios goes through the process pool
+    path = tmp_path / "scenarios.csv"
+    path.write_text(SCENARIOS)
+    results = {row['scenario']: row for row in run_scenarios(store, read_scenarios(str(path)), workers)}
+
+    assert len(results) == len(SCENARIOS.splitlines()) - 1
+    for name in ('good', 'good_amount'):
+        assert results[name]['error'] is None
+        assert results[name]['total_return_pct'] == results[name]['total_return_pct']
+    for name, message in ERRORS.items():
+        assert results[name]['error'] == message
+        assert 'true_value' not in results[name]
+    assert results['bad_sell_date']['error']
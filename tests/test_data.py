@@ -0,0 +1,161 @@
+import functools
+import os
+import shutil
+import threading
+import time
+import urllib.error
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from income_shield import data
+
+
+STALL_SECONDS = 1.5
+
+
+class SheetHandler(SimpleHTTPRequestHandler):
+    # Serves the copied CSVs with Last-Modified, so refreshes get real 304s.
+    # Each request first takes the next entry off `server.faults`: an HTTP
+    # status to fail with, or "stall" for a body that stops arriving.
+    def do_GET(self):
+        self.server.requests += 1
+        fault = self.server.faults.pop(0) if self.server.faults else None
+        if fault == "stall":
+            self.send_response(200)
+            self.send_header('Content-Length', "1000000")
+            self.end_headers()
+            self.wfile.write(b"Ticker,Date,Closing Price\n")
+            self.wfile.flush()
+            time.sleep(STALL_SECONDS)
+        elif fault:
+            self.send_error(fault)
+        else:
+            super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def sheets(tmp_path):
+    # (urls, paths, server): copies of the bundled CSVs behind a local HTTP server
+    paths = {}
+    for name, source in data.BUNDLED_CSVS.items():
+        paths[name] = tmp_path / f"{name}.csv"
+        shutil.copy(source, paths[name])
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(SheetHandler, directory=str(tmp_path)))
+    server.faults, server.requests = [], 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    urls = {name: f"http://127.0.0.1:{server.server_port}/{name}.csv" for name in paths}
+    yield urls, paths, server
+    server.shutdown()
+    server.server_close()
+
+
+def append_line(path, line):
+    # The sheets are exported without a trailing newline; the new mtime defeats If-Modified-Since
+    with open(path, 'a') as f:
+        f.write("\n" + line)
+    later = time.time() + 60
+    os.utime(path, (later, later))
+
+
+def assert_stores_equal(actual, expected):
+    assert actual['version'] == expected['version']
+    assert actual['returns'].keys() == expected['returns'].keys()
+    for ticker, entry in expected['returns'].items():
+        for key, arr in entry.items():
+            np.testing.assert_array_equal(actual['returns'][ticker][key], arr, err_msg=f"{ticker} {key}")
+    pd.testing.assert_frame_equal(actual['screener'], expected['screener'])
+    pd.testing.assert_frame_equal(actual['quality'], expected['quality'])
+
+
+def test_refresh_rebuilds_only_changed_tickers(sheets):
+    urls, paths, _ = sheets
+    validators = {}
+    store = data.refresh_store(None, validators, urls)
+    assert store['source'] == "live"
+    assert validators['unified'] and validators['history']
+
+    # Nothing changed on the server: the same store object comes back
+    assert data.refresh_store(store, validators, urls) is store
+
+    append_line(paths['unified'], "COYY,2026-01-08,8.10,18.93027")
+    append_line(paths['history'], "1/14/2026,MSTY,0.3741,1/14/2026,Dividend")
+    updated = data.refresh_store(store, validators, urls)
+    assert updated['changed'] == {'COYY', 'MSTY'}
+    # Untouched tickers keep their prefix arrays; changed ones get new ones
+    assert updated['returns']['NVDY']['growth'] is store['returns']['NVDY']['growth']
+    assert updated['returns']['MSTY']['growth'] is not store['returns']['MSTY']['growth']
+
+    df_u, df_h = data.read_csvs({name: str(path) for name, path in paths.items()})
+    assert_stores_equal(updated, data.build_store(df_u, df_h, "live"))
+    assert data.refresh_store(updated, validators, urls) is updated
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(data, 'BACKOFF_SECONDS', 0)
+
+
+@pytest.mark.usefixtures("no_backoff")
+def test_fetch_retries_server_errors(sheets):
+    urls, _, server = sheets
+    server.faults = [503, 503]
+    df, fresh = data.fetch_sheet('unified', urls['unified'], {})
+    assert len(df) and fresh['sha1']
+    assert server.requests == 3
+
+
+@pytest.mark.usefixtures("no_backoff")
+def test_fetch_gives_up_after_bounded_attempts(sheets):
+    urls, _, server = sheets
+    server.faults = [503] * data.FETCH_ATTEMPTS
+    with pytest.raises(urllib.error.HTTPError) as e:
+        data.fetch_sheet('unified', urls['unified'], {})
+    assert e.value.code == 503
+    assert server.requests == data.FETCH_ATTEMPTS
+
+
+@pytest.mark.usefixtures("no_backoff")
+def test_fetch_does_not_retry_client_errors(sheets):
+    urls, _, server = sheets
+    server.faults = [404]
+    with pytest.raises(urllib.error.HTTPError) as e:
+        data.fetch_sheet('unified', urls['unified'], {})
+    assert e.value.code == 404
+    assert server.requests == 1
+
+
+@pytest.mark.usefixtures("no_backoff")
+def test_fetch_stalled_body_gives_up(sheets, monkeypatch):
+    urls, _, server = sheets
+    monkeypatch.setattr(data, 'CONNECT_TIMEOUT', 0.2)
+    server.faults = ["stall"] * data.FETCH_ATTEMPTS
+    started = time.monotonic()
+    with pytest.raises(OSError):
+        data.fetch_sheet('unified', urls['unified'], {})
+    assert server.requests == data.FETCH_ATTEMPTS
+    assert time.monotonic() - started < data.FETCH_ATTEMPTS * STALL_SECONDS
+
+
+@pytest.mark.usefixtures("no_backoff")
+def test_cold_start_falls_back_to_bundled(sheets, monkeypatch):
+    # A snapshot that reads but won't build, with the network down as well
+    urls, _, server = sheets
+    df_u, df_h = data.read_csvs(data.BUNDLED_CSVS)
+    monkeypatch.setattr(data, 'read_local', lambda: ((df_u.drop(columns=['Closing Price']), df_h), "snapshot"))
+    server.faults = [503] * (2 * data.FETCH_ATTEMPTS)
+
+    state = data.new_state()
+    store, problem = data.load_store(state, urls)
+    assert store['source'] == "bundled"
+    assert problem.startswith("Could not load local data") and "Closing Price" in problem
+
+    state['refresh'].join()
+    store, problem = data.load_store(state, urls)
+    assert store['source'] == "bundled"
+    assert problem.startswith("Live data unavailable") and problem.endswith("showing bundled data.")
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from income_shield import data
+from income_shield.engine import calculate_journey, JourneyCache
+from income_shield.schema import dates_from_days, price_array, to_day
+
+COLUMNS = ['Date', 'Closing Price', 'Shares', 'Cash_Pocketed', 'Market_Value', 'Base_Asset_Value', 'True_Value']
+WINDOWS = [(None, None), ("2024-06-01", "2025-06-30"), ("2025-03-10", "2025-09-15")]
+
+
+def reference_journey(ticker, start_date, end_date, initial_shares, drip_enabled, unified_df, history_df):
+    # The original row-by-row loop from app.py, kept as the spec the vectorized engine must match
+    t_price = unified_df[unified_df['Ticker'] == ticker].sort_values('Date')
+    journey = t_price[(t_price['Date'] >= start_date) & (t_price['Date'] <= end_date)].copy()
+
+    if journey.empty:
+        return journey
+
+    t_divs = history_df[history_df['Ticker'] == ticker].sort_values('Date of Pay')
+    relevant_divs = t_divs[(t_divs['Date of Pay'] >= start_date) & (t_divs['Date of Pay'] <= end_date)].copy()
+
+    journey = journey.set_index('Date')
+    journey['Shares'] = initial_shares
+    journey['Cash_Pocketed'] = 0.0
+
+    current_shares = initial_shares
+    cum_cash = 0.0
+
+    for _, row in relevant_divs.iterrows():
+        d_date = row['Date of Pay']
+        d_amt = row['Amount']
+
+        if d_date in journey.index:
+            payout = current_shares * d_amt
+
+            if drip_enabled:
+                reinvest_price = journey.loc[d_date, 'Closing Price']
+                current_shares += payout / reinvest_price
+                journey.loc[d_date:, 'Shares'] = current_shares
+            else:
+                cum_cash += payout
+                journey.loc[d_date:, 'Cash_Pocketed'] = cum_cash
+
+    journey = journey.reset_index()
+    journey['Market_Value'] = journey['Closing Price'] * journey['Shares']
+    journey['Base_Asset_Value'] = journey['Closing Price'] * initial_shares
+    if drip_enabled:
+        journey['True_Value'] = journey['Market_Value']
+    else:
+        journey['True_Value'] = journey['Market_Value'] + journey['Cash_Pocketed']
+    return journey
+
+
+@pytest.fixture(scope="module")
+def bundled():
+    # The loop only credits payouts that land on a session, so both sides get a
+    # history restricted to those; the next-session rule is tested on its own below
+    df_u, df_h = data.read_csvs(data.BUNDLED_CSVS)
+    store = data.build_store(df_u, df_h, "bundled")
+    sessions = pd.MultiIndex.from_arrays([store['unified']['Ticker'].astype(str), store['unified']['Date']])
+    paid = pd.MultiIndex.from_arrays([store['history']['Ticker'].astype(str), store['history']['Date of Pay']])
+    on_session = store['history'][paid.isin(sessions)].reset_index(drop=True)
+    store = data.build_store(store['unified'], on_session, "bundled")
+
+    unified = store['unified'].assign(Date=dates_from_days(store['unified']['Date']),
+                                      **{'Closing Price': price_array(store['unified']['Closing Price'])})
+    history = store['history'].assign(**{'Date of Pay': dates_from_days(store['history']['Date of Pay'])})
+    return store, unified, history
+
+
+def busiest_tickers(history, n=8):
+    return history['Ticker'].astype(str).value_counts().index[:n].tolist()
+
+
+@pytest.mark.parametrize("drip", [False, True])
+@pytest.mark.parametrize("window", WINDOWS)
+def test_matches_reference_loop(bundled, window, drip):
+    store, unified, history = bundled
+    for ticker in busiest_tickers(history):
+        dates = unified.loc[unified['Ticker'] == ticker, 'Date']
+        start = pd.Timestamp(window[0]) if window[0] else dates.min()
+        end = pd.Timestamp(window[1]) if window[1] else dates.max()
+
+        expected = reference_journey(ticker, start, end, 25.0, drip, unified, history)
+        actual = calculate_journey(ticker, start, end, 25.0, drip, store, cache=JourneyCache(max_bytes=0))
+        if expected.empty:
+            assert actual.empty
+            continue
+        pd.testing.assert_frame_equal(actual[COLUMNS].reset_index(drop=True), expected[COLUMNS].reset_index(drop=True),
+                                      check_dtype=False, check_index_type=False, rtol=1e-9, obj=f"{ticker} {window}")
+
+
+@pytest.mark.parametrize("drip", [False, True])
+def test_off_session_payout_credited_next_session(bundled, drip):
+    # A payout dated on a day with no close lands on the following session
+    store, unified, history = bundled
+    ticker = busiest_tickers(history, 1)[0]
+    dates = unified.loc[unified['Ticker'] == ticker, 'Date'].sort_values().reset_index(drop=True)
+    gap = int(np.flatnonzero(dates.diff().dt.days.to_numpy() > 1)[0])
+    session, prev = dates[gap], dates[gap - 1]
+    shifted = history[history['Ticker'] == ticker].iloc[:1].assign(**{'Date of Pay': prev + pd.Timedelta(days=1)})
+
+    moved = pd.concat([store['history'], shifted.assign(**{'Date of Pay': to_day(shifted['Date of Pay'].iloc[0])})])
+    off = data.build_store(store['unified'], moved.reset_index(drop=True), "bundled")
+    on_session = pd.concat([history, shifted.assign(**{'Date of Pay': session})])
+
+    start, end = dates[max(gap - 5, 0)], dates[gap + 5]
+    expected = reference_journey(ticker, start, end, 10.0, drip, unified, on_session)
+    actual = calculate_journey(ticker, start, end, 10.0, drip, off, cache=JourneyCache(max_bytes=0))
+    pd.testing.assert_frame_equal(actual[COLUMNS].reset_index(drop=True), expected[COLUMNS].reset_index(drop=True),
+                                  check_dtype=False, check_index_type=False, rtol=1e-9)